@@ -0,0 +1,112 @@
+"""Сводные таблицы по дням и месяцам.
+
+Пересборка с нуля:
+    python aggregates.py rebuild
+Пересчет за период:
+    python aggregates.py refresh 2025-05-01 2025-05-11
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Iterable, List
+
+from database import pooled_connection
+from logging_setup import configure_logging
+from sqlalchemy import TextClause, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Date
+
+logger = logging.getLogger(__name__)
+
+# Пересчет сводок сериализуется, чтобы параллельные загрузки не пересекались по одним и тем же ключам
+AGGREGATES_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext('spimex_aggregates'))")
+
+DATES_FILTER = "WHERE date = ANY(:dates)"
+# Полуоткрытый диапазон по date использует индекс; date_trunc отсекает незатронутые месяцы внутри него
+MONTHS_FILTER = (
+    "WHERE date >= :months_start AND date < :months_end AND date_trunc('month', date)::date = ANY(:months)"
+)
+
+
+def insert_daily_sql(where: str = "") -> TextClause:
+    return text(
+        f"""
+        INSERT INTO spimex_daily_aggregates
+        SELECT date, oil_id, delivery_basis_id, delivery_type_id, sum(volume), sum(total), sum(count), count(*)
+        FROM spimex_trading_results
+        {where}
+        GROUP BY date, oil_id, delivery_basis_id, delivery_type_id
+        """
+    )
+
+
+def insert_monthly_sql(where: str = "") -> TextClause:
+    # Месячные сводки собираются из дневных, а не из сырых строк
+    return text(
+        f"""
+        INSERT INTO spimex_monthly_aggregates
+        SELECT date_trunc('month', date)::date AS month, oil_id, delivery_basis_id, delivery_type_id,
+               sum(volume), sum(total), sum(count), sum(rows)
+        FROM spimex_daily_aggregates
+        {where}
+        GROUP BY 1, oil_id, delivery_basis_id, delivery_type_id
+        """
+    )
+
+
+async def refresh_aggregates(dates: Iterable[date]) -> None:
+    """Пересчитывает дневные сводки за указанные даты и месячные за затронутые месяцы."""
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    months = sorted({trade_date.replace(day=1) for trade_date in dates})
+    dates_param = bindparam("dates", dates, type_=ARRAY(Date))
+    months_param = bindparam("months", months, type_=ARRAY(Date))
+    months_range = {"months_start": months[0], "months_end": next_month(months[-1])}
+
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(AGGREGATES_LOCK_SQL)
+        await conn.execute(text(f"DELETE FROM spimex_daily_aggregates {DATES_FILTER}").bindparams(dates_param))
+        await conn.execute(insert_daily_sql(DATES_FILTER).bindparams(dates_param))
+        await conn.execute(text("DELETE FROM spimex_monthly_aggregates WHERE month = ANY(:months)").bindparams(months_param))
+        await conn.execute(insert_monthly_sql(MONTHS_FILTER).bindparams(months_param), months_range)
+    logger.info(f"Сводки пересчитаны за {len(dates)} дат ({dates[0]} — {dates[-1]}), месяцев: {len(months)}")
+
+
+async def rebuild_aggregates() -> None:
+    """Пересобирает все сводки из spimex_trading_results."""
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(AGGREGATES_LOCK_SQL)
+        await conn.execute(text("TRUNCATE spimex_daily_aggregates, spimex_monthly_aggregates"))
+        await conn.execute(insert_daily_sql())
+        await conn.execute(insert_monthly_sql())
+    logger.info("Сводки пересобраны полностью")
+
+
+def next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def date_range(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сводные таблицы результатов торгов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="пересобрать сводки с нуля")
+    refresh_parser = subparsers.add_parser("refresh", help="пересчитать сводки за период")
+    refresh_parser.add_argument("start", type=date.fromisoformat)
+    refresh_parser.add_argument("end", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    configure_logging("aggregates.log")
+    if args.command == "rebuild":
+        asyncio.run(rebuild_aggregates())
+    else:
+        asyncio.run(refresh_aggregates(date_range(args.start, args.end)))
+
+
+if __name__ == "__main__":
+    main()
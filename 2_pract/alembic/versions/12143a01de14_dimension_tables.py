@@ -0,0 +1,128 @@
+"""instrument and delivery basis dimensions
+
+Revision ID: 12143a01de14
+Revises: 6bdeeafa143c
+Create Date: 2026-10-18 12:26:54.730162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '12143a01de14'
+down_revision: Union[str, None] = '6bdeeafa143c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('delivery_bases',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('code', sa.CHAR(3), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', name='uq_delivery_bases_name')
+    )
+    op.create_table('instruments',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('exchange_product_id', sa.String(20), nullable=False),
+    sa.Column('exchange_product_name', sa.String(), nullable=False),
+    sa.Column('delivery_base_id', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['delivery_base_id'], ['delivery_bases.id']),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exchange_product_id', name='uq_instruments_exchange_product_id')
+    )
+
+    # Справочники заполняются последними по дате названиями из уже загруженных строк
+    op.execute(
+        """
+        INSERT INTO delivery_bases (code, name)
+        SELECT DISTINCT ON (delivery_basis_name) delivery_basis_id, delivery_basis_name
+        FROM spimex_trading_results
+        ORDER BY delivery_basis_name, date DESC
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO instruments (exchange_product_id, exchange_product_name, delivery_base_id)
+        SELECT DISTINCT ON (t.exchange_product_id) t.exchange_product_id, t.exchange_product_name, b.id
+        FROM spimex_trading_results AS t
+        JOIN delivery_bases AS b ON b.name = t.delivery_basis_name
+        ORDER BY t.exchange_product_id, t.date DESC
+        """
+    )
+
+    op.add_column('spimex_trading_results', sa.Column('instrument_id', sa.SmallInteger(), nullable=True))
+    op.execute(
+        """
+        UPDATE spimex_trading_results AS t
+        SET instrument_id = i.id
+        FROM instruments AS i
+        WHERE i.exchange_product_id = t.exchange_product_id
+        """
+    )
+    op.alter_column('spimex_trading_results', 'instrument_id', nullable=False)
+    op.create_foreign_key(
+        'fk_spimex_trading_results_instrument', 'spimex_trading_results', 'instruments', ['instrument_id'], ['id']
+    )
+
+    op.drop_constraint('uq_spimex_trading_results_date_product', 'spimex_trading_results', type_='unique')
+    op.create_unique_constraint(
+        'uq_spimex_trading_results_date_instrument', 'spimex_trading_results', ['date', 'instrument_id']
+    )
+    op.drop_column('spimex_trading_results', 'exchange_product_id')
+    op.drop_column('spimex_trading_results', 'exchange_product_name')
+    op.drop_column('spimex_trading_results', 'delivery_basis_name')
+
+    # Коды — срезы кода инструмента фиксированной длины
+    for column, length in (('oil_id', 4), ('delivery_basis_id', 3), ('delivery_type_id', 1)):
+        op.alter_column(
+            'spimex_trading_results',
+            column,
+            type_=sa.CHAR(length),
+            existing_type=sa.String(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::char({length})',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('oil_id', 'delivery_basis_id', 'delivery_type_id'):
+        op.alter_column(
+            'spimex_trading_results',
+            column,
+            type_=sa.String(),
+            existing_nullable=False,
+            postgresql_using=f'rtrim({column})::varchar',
+        )
+
+    op.add_column('spimex_trading_results', sa.Column('exchange_product_id', sa.String(), nullable=True))
+    op.add_column('spimex_trading_results', sa.Column('exchange_product_name', sa.String(), nullable=True))
+    op.add_column('spimex_trading_results', sa.Column('delivery_basis_name', sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE spimex_trading_results AS t
+        SET exchange_product_id = i.exchange_product_id,
+            exchange_product_name = i.exchange_product_name,
+            delivery_basis_name = b.name
+        FROM instruments AS i
+        JOIN delivery_bases AS b ON b.id = i.delivery_base_id
+        WHERE i.id = t.instrument_id
+        """
+    )
+    for column in ('exchange_product_id', 'exchange_product_name', 'delivery_basis_name'):
+        op.alter_column('spimex_trading_results', column, nullable=False)
+
+    op.drop_constraint('uq_spimex_trading_results_date_instrument', 'spimex_trading_results', type_='unique')
+    op.create_unique_constraint(
+        'uq_spimex_trading_results_date_product', 'spimex_trading_results', ['date', 'exchange_product_id']
+    )
+    op.drop_constraint('fk_spimex_trading_results_instrument', 'spimex_trading_results', type_='foreignkey')
+    op.drop_column('spimex_trading_results', 'instrument_id')
+    op.drop_table('instruments')
+    op.drop_table('delivery_bases')
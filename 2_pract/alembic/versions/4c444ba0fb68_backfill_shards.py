@@ -0,0 +1,43 @@
+"""backfill shard lease table
+
+Revision ID: 4c444ba0fb68
+Revises: ac800afdd935
+Create Date: 2026-10-18 15:52:30.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c444ba0fb68'
+down_revision: Union[str, None] = 'ac800afdd935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('backfill_shards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(16), server_default='pending', nullable=False),
+    sa.Column('worker_id', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_on', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_on', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('start_date', 'end_date', name='uq_backfill_shards_range')
+    )
+    op.create_index('ix_backfill_shards_status_start_date', 'backfill_shards', ['status', 'start_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('backfill_shards')
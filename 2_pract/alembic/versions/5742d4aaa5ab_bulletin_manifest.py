@@ -0,0 +1,40 @@
+"""bulletin ingest manifest
+
+Revision ID: 5742d4aaa5ab
+Revises: 4c444ba0fb68
+Create Date: 2026-10-18 17:21:04.512230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5742d4aaa5ab'
+down_revision: Union[str, None] = '4c444ba0fb68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bulletin_manifest',
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=True),
+    sa.Column('content_hash', sa.CHAR(64), nullable=True),
+    sa.Column('byte_size', sa.BigInteger(), nullable=True),
+    sa.Column('row_count', sa.Integer(), nullable=True),
+    sa.Column('stage', sa.String(16), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_on', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_on', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('trade_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bulletin_manifest')
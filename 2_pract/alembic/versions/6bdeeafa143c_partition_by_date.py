@@ -0,0 +1,118 @@
+"""partition trading results by date
+
+Revision ID: 6bdeeafa143c
+Revises: e4de90232c2a
+Create Date: 2026-10-18 11:03:17.582930
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6bdeeafa143c'
+down_revision: Union[str, None] = 'e4de90232c2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_basis_name, "
+    "delivery_type_id, volume, total, count, date, created_on, updated_on"
+)
+COLUMNS_DDL = """
+    id INTEGER NOT NULL DEFAULT nextval('spimex_trading_results_id_seq'),
+    exchange_product_id VARCHAR NOT NULL,
+    exchange_product_name VARCHAR NOT NULL,
+    oil_id VARCHAR NOT NULL,
+    delivery_basis_id VARCHAR NOT NULL,
+    delivery_basis_name VARCHAR NOT NULL,
+    delivery_type_id VARCHAR NOT NULL,
+    volume FLOAT NOT NULL,
+    total FLOAT NOT NULL,
+    count INTEGER NOT NULL,
+    date DATE NOT NULL,
+    created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    updated_on TIMESTAMP WITHOUT TIME ZONE NOT NULL
+"""
+# Месяцы вперед, для которых партиции создаются сразу
+MONTHS_AHEAD = 3
+
+
+def add_months(month_start: date, months: int) -> date:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Освобождаем имена таблицы и ограничений для новой секционированной таблицы
+    op.rename_table('spimex_trading_results', 'spimex_trading_results_old')
+    op.execute('ALTER TABLE spimex_trading_results_old RENAME CONSTRAINT spimex_trading_results_pkey TO spimex_trading_results_old_pkey')
+    op.execute('ALTER TABLE spimex_trading_results_old RENAME CONSTRAINT uq_spimex_trading_results_date_product TO uq_spimex_trading_results_old_date_product')
+
+    op.execute(
+        f"""
+        CREATE TABLE spimex_trading_results (
+            {COLUMNS_DDL},
+            CONSTRAINT spimex_trading_results_pkey PRIMARY KEY (id, date),
+            CONSTRAINT uq_spimex_trading_results_date_product UNIQUE (date, exchange_product_id)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute('ALTER SEQUENCE spimex_trading_results_id_seq OWNED BY spimex_trading_results.id')
+
+    # Индексы под фильтры по нефтепродукту/базису/типу поставки в диапазоне дат;
+    # фильтр только по дате обслуживает уникальный ключ (date, exchange_product_id)
+    op.create_index(
+        'ix_spimex_trading_results_oil_basis_type_date',
+        'spimex_trading_results',
+        ['oil_id', 'delivery_basis_id', 'delivery_type_id', 'date'],
+    )
+    op.create_index(
+        'ix_spimex_trading_results_basis_date',
+        'spimex_trading_results',
+        ['delivery_basis_id', 'date'],
+    )
+
+    min_date, max_date = bind.execute(sa.text('SELECT min(date), max(date) FROM spimex_trading_results_old')).one()
+    today = date.today()
+    first_date = min_date or today
+    last_date = max(max_date or today, today)
+    month = date(first_date.year, first_date.month, 1)
+    last_month = add_months(date(last_date.year, last_date.month, 1), MONTHS_AHEAD)
+    while month <= last_month:
+        next_month = add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE spimex_trading_results_y{month.year}m{month.month:02d} "
+            f"PARTITION OF spimex_trading_results FOR VALUES FROM ('{month}') TO ('{next_month}')"
+        )
+        month = next_month
+
+    op.execute(f'INSERT INTO spimex_trading_results ({COLUMNS}) SELECT {COLUMNS} FROM spimex_trading_results_old')
+    op.drop_table('spimex_trading_results_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('spimex_trading_results', 'spimex_trading_results_partitioned')
+    op.execute('ALTER TABLE spimex_trading_results_partitioned RENAME CONSTRAINT spimex_trading_results_pkey TO spimex_trading_results_partitioned_pkey')
+    op.execute('ALTER TABLE spimex_trading_results_partitioned RENAME CONSTRAINT uq_spimex_trading_results_date_product TO uq_spimex_trading_results_partitioned_date_product')
+
+    op.execute(
+        f"""
+        CREATE TABLE spimex_trading_results (
+            {COLUMNS_DDL},
+            CONSTRAINT spimex_trading_results_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_spimex_trading_results_date_product UNIQUE (date, exchange_product_id)
+        )
+        """
+    )
+    op.execute('ALTER SEQUENCE spimex_trading_results_id_seq OWNED BY spimex_trading_results.id')
+    op.execute(f'INSERT INTO spimex_trading_results ({COLUMNS}) SELECT {COLUMNS} FROM spimex_trading_results_partitioned')
+    # Вместе с секционированной таблицей удаляются ее партиции и индексы
+    op.drop_table('spimex_trading_results_partitioned')
@@ -0,0 +1,63 @@
+"""daily and monthly aggregates
+
+Revision ID: ac800afdd935
+Revises: 12143a01de14
+Create Date: 2026-10-18 14:41:08.316277
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ac800afdd935'
+down_revision: Union[str, None] = '12143a01de14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, period in (('spimex_daily_aggregates', 'date'), ('spimex_monthly_aggregates', 'month')):
+        op.create_table(table,
+        sa.Column(period, sa.Date(), nullable=False),
+        sa.Column('oil_id', sa.CHAR(4), nullable=False),
+        sa.Column('delivery_basis_id', sa.CHAR(3), nullable=False),
+        sa.Column('delivery_type_id', sa.CHAR(1), nullable=False),
+        sa.Column('volume', sa.Float(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(period, 'oil_id', 'delivery_basis_id', 'delivery_type_id')
+        )
+        op.create_index(
+            f'ix_{table}_oil_basis_type_{period}',
+            table,
+            ['oil_id', 'delivery_basis_id', 'delivery_type_id', period],
+        )
+
+    op.execute(
+        """
+        INSERT INTO spimex_daily_aggregates
+        SELECT date, oil_id, delivery_basis_id, delivery_type_id, sum(volume), sum(total), sum(count), count(*)
+        FROM spimex_trading_results
+        GROUP BY date, oil_id, delivery_basis_id, delivery_type_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO spimex_monthly_aggregates
+        SELECT date_trunc('month', date)::date, oil_id, delivery_basis_id, delivery_type_id,
+               sum(volume), sum(total), sum(count), sum(rows)
+        FROM spimex_daily_aggregates
+        GROUP BY 1, oil_id, delivery_basis_id, delivery_type_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('spimex_monthly_aggregates')
+    op.drop_table('spimex_daily_aggregates')
@@ -0,0 +1,42 @@
+"""natural key for trading results
+
+Revision ID: e4de90232c2a
+Revises: 0d05e7ad5a63
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4de90232c2a'
+down_revision: Union[str, None] = '0d05e7ad5a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Убираем дубли, накопленные повторными запусками, оставляя последнюю загруженную строку
+    op.execute(
+        """
+        DELETE FROM spimex_trading_results AS t
+        USING spimex_trading_results AS newer
+        WHERE t.date = newer.date
+          AND t.exchange_product_id = newer.exchange_product_id
+          AND t.id < newer.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_spimex_trading_results_date_product',
+        'spimex_trading_results',
+        ['date', 'exchange_product_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_spimex_trading_results_date_product', 'spimex_trading_results', type_='unique')
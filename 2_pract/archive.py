@@ -0,0 +1,187 @@
+"""Сжатый архив исходных бюллетеней.
+
+Бюллетени одного месяца лежат в одном файле YYYY-MM.bundle: каждый сжат отдельным
+кадром zstd и дописан в конец. Рядом YYYY-MM.index.json — смещение и длина кадра
+по дате торгов, поэтому любой бюллетень читается без распаковки остальных.
+
+    python archive.py pack bulletins        # упаковать уже скачанные .xls
+    python archive.py get 2025-05-08 out.xls
+    python archive.py ls 2025-05
+"""
+import argparse
+import asyncio
+import fcntl
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import ARCHIVE_DIR, ARCHIVE_ZSTD_LEVEL
+from metrics import write_atomic
+
+logger = logging.getLogger(__name__)
+
+FILE_DATE_PATTERN = re.compile(r"oil_xls_(\d{8})")
+
+# Признак остановки для очереди архивации
+ARCHIVE_DONE = None
+
+
+class BulletinArchive:
+    """Помесячные zstd-бандлы бюллетеней с индексом по дате для произвольного доступа."""
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR, level: int = ARCHIVE_ZSTD_LEVEL) -> None:
+        self.archive_dir = archive_dir
+        self.level = level
+        self._indexes: Dict[str, Dict[str, dict]] = {}
+
+    @staticmethod
+    def month(trade_date: date) -> str:
+        return trade_date.strftime("%Y-%m")
+
+    def bundle_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f"{month}.bundle")
+
+    def index_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f"{month}.index.json")
+
+    def index(self, month: str, reload: bool = False) -> Dict[str, dict]:
+        if reload or month not in self._indexes:
+            try:
+                with open(self.index_path(month), encoding="utf-8") as f:
+                    self._indexes[month] = json.load(f)
+            except FileNotFoundError:
+                self._indexes[month] = {}
+        return self._indexes[month]
+
+    def contains(self, trade_date: date) -> bool:
+        return trade_date.isoformat() in self.index(self.month(trade_date))
+
+    def dates(self, month: str) -> List[date]:
+        return sorted(date.fromisoformat(key) for key in self.index(month))
+
+    @contextmanager
+    def locked(self, month: str) -> Iterator[None]:
+        """Блокировка месяца между процессами: в один бандл дописывает только один писатель."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(os.path.join(self.archive_dir, f"{month}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def put(self, trade_date: date, content: bytes, url: Optional[str] = None) -> bool:
+        """Дописывает бюллетень в бандл месяца. Возвращает False, если он уже в архиве с тем же содержимым."""
+        import zstandard
+
+        month = self.month(trade_date)
+        key = trade_date.isoformat()
+        digest = hashlib.sha256(content).hexdigest()
+        with self.locked(month):
+            index = self.index(month, reload=True)
+            if index.get(key, {}).get("sha256") == digest:
+                return False
+            frame = zstandard.ZstdCompressor(level=self.level, write_content_size=True).compress(content)
+            # Хвост после последнего проиндексированного кадра — остаток прерванной записи, он затирается
+            end = max((entry["offset"] + entry["length"] for entry in index.values()), default=0)
+            with open(self.bundle_path(month), "ab") as f:
+                f.truncate(end)
+                f.seek(end)
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            index[key] = {"offset": end, "length": len(frame), "size": len(content), "sha256": digest, "url": url}
+            write_atomic(self.index_path(month), json.dumps(index, ensure_ascii=False, indent=1, sort_keys=True))
+        return True
+
+    def get(self, trade_date: date) -> Optional[bytes]:
+        """Читает один бюллетень из бандла по индексу или возвращает None."""
+        import zstandard
+
+        month = self.month(trade_date)
+        entry = self.index(month).get(trade_date.isoformat())
+        if entry is None:
+            return None
+        with open(self.bundle_path(month), "rb") as f:
+            f.seek(entry["offset"])
+            frame = f.read(entry["length"])
+        content = zstandard.ZstdDecompressor().decompress(frame)
+        if hashlib.sha256(content).hexdigest() != entry["sha256"]:
+            logger.error(f"Бюллетень за {trade_date} в архиве поврежден")
+            return None
+        return content
+
+    def pack(self, files: List[Tuple[str, date]], remove: bool = False) -> int:
+        """Упаковывает готовые файлы в архив; с remove исходные файлы удаляются после записи."""
+        packed = 0
+        for file_path, trade_date in files:
+            with open(file_path, "rb") as f:
+                content = f.read()
+            packed += self.put(trade_date, content)
+            if remove:
+                os.remove(file_path)
+        return packed
+
+
+def bulletin_files(directory: str) -> List[Tuple[str, date]]:
+    """Файлы oil_xls_YYYYMMDD*.xls каталога с датами торгов."""
+    files = []
+    for file_path in sorted(glob.glob(os.path.join(directory, "oil_xls_*.xls"))):
+        match = FILE_DATE_PATTERN.search(os.path.basename(file_path))
+        if match:
+            files.append((file_path, datetime.strptime(match.group(1), "%Y%m%d").date()))
+    return files
+
+
+async def archive_bulletins(archive: BulletinArchive, archive_queue: asyncio.Queue) -> int:
+    """Стадия архивации: дописывает (дата, url, содержимое) из очереди в архив в фоновом потоке."""
+    archived = 0
+    while (item := await archive_queue.get()) is not ARCHIVE_DONE:
+        trade_date, url, content = item
+        try:
+            archived += await asyncio.to_thread(archive.put, trade_date, content, url)
+        except OSError as e:
+            logger.error(f"Не удалось заархивировать бюллетень за {trade_date}: {e}")
+    if archived:
+        logger.info(f"В архив добавлено {archived} бюллетеней")
+    return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Архив исходных бюллетеней")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="упаковать скачанные .xls в архив")
+    pack_parser.add_argument("directory")
+    pack_parser.add_argument("--remove", action="store_true", help="удалить упакованные файлы")
+    get_parser = subparsers.add_parser("get", help="извлечь бюллетень за дату")
+    get_parser.add_argument("date", type=date.fromisoformat)
+    get_parser.add_argument("output")
+    ls_parser = subparsers.add_parser("ls", help="даты бюллетеней в бандле месяца")
+    ls_parser.add_argument("month", help="YYYY-MM")
+    args = parser.parse_args()
+
+    archive = BulletinArchive(args.archive_dir)
+    if args.command == "pack":
+        files = bulletin_files(args.directory)
+        print(f"Упаковано {archive.pack(files, args.remove)} из {len(files)} файлов")
+    elif args.command == "get":
+        content = archive.get(args.date)
+        if content is None:
+            raise SystemExit(f"Бюллетеня за {args.date} нет в архиве")
+        with open(args.output, "wb") as f:
+            f.write(content)
+    else:
+        for trade_date in archive.dates(args.month):
+            entry = archive.index(args.month)[trade_date.isoformat()]
+            print(f"{trade_date}  {entry['size']:>9}  {entry['length']:>9}")
+
+
+if __name__ == "__main__":
+    main()
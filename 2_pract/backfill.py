@@ -0,0 +1,293 @@
+"""Распределенная догрузка истории по шардам.
+
+Период режется на шарды в таблице backfill_shards, воркеры (процессы или хосты)
+забирают их через FOR UPDATE SKIP LOCKED и продлевают аренду heartbeat'ом.
+Шард упавшего воркера по истечении аренды забирает другой, но не больше
+BACKFILL_MAX_ATTEMPTS попыток; потом шард переходит в failed.
+
+    python backfill.py plan 2023-04-22 2025-05-11
+    python backfill.py work --processes 4
+    python backfill.py status
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from config import BACKFILL_HEARTBEAT_SECONDS, BACKFILL_LEASE_SECONDS, BACKFILL_MAX_ATTEMPTS, BACKFILL_SHARD_DAYS
+from database import pooled_connection
+from logging_setup import configure_logging
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Date
+
+logger = logging.getLogger(__name__)
+
+# Шард, воркер которого падал на нем max_attempts раз (OOM, файл, роняющий парсер),
+# больше не переназначается
+EXHAUST_SQL = text(
+    """
+    UPDATE backfill_shards
+    SET status = 'failed', lease_expires_at = NULL, updated_on = now(),
+        last_error = coalesce(last_error, 'Аренда истекла: воркер не завершил шард')
+    WHERE status = 'running' AND lease_expires_at < now() AND attempts >= :max_attempts
+    """
+)
+
+# Свободный шард: ожидающий или брошенный воркером с истекшей арендой и неисчерпанными попытками
+CLAIM_SQL = text(
+    """
+    UPDATE backfill_shards
+    SET status = 'running', worker_id = :worker_id, attempts = attempts + 1,
+        lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(), updated_on = now()
+    WHERE id = (
+        SELECT id FROM backfill_shards
+        WHERE status = 'pending'
+            OR (status = 'running' AND lease_expires_at < now() AND attempts < :max_attempts)
+        ORDER BY start_date
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, start_date, end_date, attempts
+    """
+)
+
+HEARTBEAT_SQL = text(
+    """
+    UPDATE backfill_shards
+    SET lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(), updated_on = now()
+    WHERE id = :id AND worker_id = :worker_id AND status = 'running'
+    """
+)
+
+COMPLETE_SQL = text(
+    """
+    UPDATE backfill_shards
+    SET status = 'done', lease_expires_at = NULL, last_error = NULL, updated_on = now()
+    WHERE id = :id AND worker_id = :worker_id AND status = 'running'
+    """
+)
+
+FAIL_SQL = text(
+    """
+    UPDATE backfill_shards
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+        lease_expires_at = NULL, last_error = :error, updated_on = now()
+    WHERE id = :id AND worker_id = :worker_id AND status = 'running'
+    """
+)
+
+
+class Shard(NamedTuple):
+    id: int
+    start_date: date
+    end_date: date
+    attempts: int
+
+
+class LeaseLostError(RuntimeError):
+    """Аренда шарда перехвачена другим воркером."""
+
+
+def split_range(start_date: date, end_date: date, shard_days: int) -> List[Tuple[date, date]]:
+    """Режет период на последовательные отрезки по shard_days дней."""
+    shards = []
+    current = start_date
+    while current <= end_date:
+        shard_end = min(current + timedelta(days=shard_days - 1), end_date)
+        shards.append((current, shard_end))
+        current = shard_end + timedelta(days=1)
+    return shards
+
+
+async def plan_shards(start_date: date, end_date: date, shard_days: int = BACKFILL_SHARD_DAYS) -> int:
+    """Регистрирует шарды периода; уже существующие не трогаются. Возвращает число новых."""
+    shards = split_range(start_date, end_date, shard_days)
+    starts = bindparam("starts", [start for start, _ in shards], type_=ARRAY(Date))
+    ends = bindparam("ends", [end for _, end in shards], type_=ARRAY(Date))
+    async with pooled_connection() as conn, conn.begin():
+        result = await conn.execute(
+            text(
+                """
+                INSERT INTO backfill_shards (start_date, end_date)
+                SELECT * FROM unnest(:starts, :ends)
+                ON CONFLICT ON CONSTRAINT uq_backfill_shards_range DO NOTHING
+                RETURNING id
+                """
+            ).bindparams(starts, ends)
+        )
+        created = len(result.all())
+    logger.info(f"Запланировано шардов: {created} новых из {len(shards)}")
+    return created
+
+
+async def claim_shard(worker_id: str, lease_seconds: int = BACKFILL_LEASE_SECONDS) -> Optional[Shard]:
+    async with pooled_connection() as conn, conn.begin():
+        exhausted = await conn.execute(EXHAUST_SQL, {"max_attempts": BACKFILL_MAX_ATTEMPTS})
+        if exhausted.rowcount:
+            logger.error(f"Шардов с исчерпанными попытками переведено в failed: {exhausted.rowcount}")
+        params = {"worker_id": worker_id, "lease": lease_seconds, "max_attempts": BACKFILL_MAX_ATTEMPTS}
+        row = (await conn.execute(CLAIM_SQL, params)).first()
+    return Shard(*row) if row else None
+
+
+async def renew_lease(shard: Shard, worker_id: str, lease_seconds: int = BACKFILL_LEASE_SECONDS) -> bool:
+    """Продлевает аренду; False означает, что шард уже не принадлежит воркеру."""
+    async with pooled_connection() as conn, conn.begin():
+        result = await conn.execute(HEARTBEAT_SQL, {"id": shard.id, "worker_id": worker_id, "lease": lease_seconds})
+    return result.rowcount == 1
+
+
+async def complete_shard(shard: Shard, worker_id: str) -> None:
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(COMPLETE_SQL, {"id": shard.id, "worker_id": worker_id})
+
+
+async def fail_shard(shard: Shard, worker_id: str, error: str) -> None:
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(
+            FAIL_SQL,
+            {"id": shard.id, "worker_id": worker_id, "error": error, "max_attempts": BACKFILL_MAX_ATTEMPTS},
+        )
+
+
+async def has_running_shards() -> bool:
+    async with pooled_connection() as conn:
+        result = await conn.execute(text("SELECT EXISTS (SELECT 1 FROM backfill_shards WHERE status = 'running')"))
+        return bool(result.scalar())
+
+
+async def heartbeat(shard: Shard, worker_id: str, work: asyncio.Task) -> None:
+    """Продлевает аренду, пока идет обработка; при потере аренды отменяет работу."""
+    while not work.done():
+        await asyncio.sleep(BACKFILL_HEARTBEAT_SECONDS)
+        try:
+            if not await renew_lease(shard, worker_id):
+                logger.warning(f"Шард {shard.id}: аренда потеряна, обработка прерывается")
+                work.cancel(msg="lease lost")
+                return
+        except Exception as e:
+            # Временная ошибка базы не повод бросать шард: аренда с запасом переживет пропуск
+            logger.warning(f"Шард {shard.id}: не удалось продлить аренду: {e}")
+
+
+async def load_shard(shard: Shard, output_dir: str) -> int:
+    """Загружает шард по ссылкам со страниц списка, найденных поиском, а не обходом с первой страницы."""
+    from planner import locate_range
+    from spimex_parser import create_http_session, process_bulletins
+
+    async with create_http_session() as session:
+        links = await locate_range(session, shard.start_date, shard.end_date)
+    return await process_bulletins(shard.start_date, shard.end_date, output_dir, links=links)
+
+
+async def process_shard(shard: Shard, worker_id: str, output_dir: str) -> None:
+    work = asyncio.create_task(load_shard(shard, output_dir))
+    keeper = asyncio.create_task(heartbeat(shard, worker_id, work))
+    try:
+        await work
+    except asyncio.CancelledError:
+        if keeper.done() and not asyncio.current_task().cancelling():
+            raise LeaseLostError(f"Шард {shard.id} перехвачен другим воркером")
+        raise
+    finally:
+        keeper.cancel()
+
+
+async def run_worker(worker_id: str, output_dir: str = "bulletins") -> int:
+    """Забирает и обрабатывает шарды, пока они есть. Возвращает число обработанных."""
+    processed = 0
+    while True:
+        shard = await claim_shard(worker_id)
+        if shard is None:
+            # Пока у других воркеров есть шарды в работе, их аренда может истечь
+            if await has_running_shards():
+                await asyncio.sleep(BACKFILL_HEARTBEAT_SECONDS)
+                continue
+            break
+
+        logger.info(f"[{worker_id}] Шард {shard.id}: {shard.start_date} — {shard.end_date}, попытка {shard.attempts}")
+        try:
+            await process_shard(shard, worker_id, output_dir)
+        except LeaseLostError as e:
+            logger.warning(f"[{worker_id}] {e}")
+            continue
+        except Exception as e:
+            logger.error(f"[{worker_id}] Шард {shard.id} завершился ошибкой: {e}")
+            await fail_shard(shard, worker_id, str(e))
+            continue
+
+        await complete_shard(shard, worker_id)
+        processed += 1
+        logger.info(f"[{worker_id}] Шард {shard.id} обработан")
+
+    logger.info(f"[{worker_id}] Свободных шардов нет, обработано: {processed}")
+    return processed
+
+
+async def shard_status() -> List[Tuple[str, int, Optional[date], Optional[date]]]:
+    async with pooled_connection() as conn:
+        result = await conn.execute(
+            text(
+                """
+                SELECT status, count(*), min(start_date), max(end_date)
+                FROM backfill_shards GROUP BY status ORDER BY status
+                """
+            )
+        )
+        return [tuple(row) for row in result]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def worker_process(worker_id: Optional[str], output_dir: str) -> None:
+    configure_logging("backfill.log")
+    asyncio.run(run_worker(worker_id or default_worker_id(), output_dir))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Распределенная догрузка истории")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    plan_parser = subparsers.add_parser("plan", help="разбить период на шарды")
+    plan_parser.add_argument("start", type=date.fromisoformat)
+    plan_parser.add_argument("end", type=date.fromisoformat)
+    plan_parser.add_argument("--shard-days", type=int, default=BACKFILL_SHARD_DAYS)
+    work_parser = subparsers.add_parser("work", help="обрабатывать шарды")
+    work_parser.add_argument("--worker-id", help="идентификатор воркера, по умолчанию хост-pid")
+    work_parser.add_argument("--processes", type=int, default=1, help="число воркеров на этом хосте")
+    work_parser.add_argument("--output-dir", default="bulletins")
+    subparsers.add_parser("status", help="состояние шардов")
+    args = parser.parse_args()
+
+    configure_logging("backfill.log")
+    if args.command == "plan":
+        asyncio.run(plan_shards(args.start, args.end, args.shard_days))
+    elif args.command == "status":
+        for status, count, first, last in asyncio.run(shard_status()):
+            print(f"{status:<8} {count:>5}  {first} — {last}")
+    elif args.processes == 1:
+        asyncio.run(run_worker(args.worker_id or default_worker_id(), args.output_dir))
+    else:
+        # spawn: каждый воркер создает свой пул соединений, а не наследует родительский
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(
+                target=worker_process,
+                args=(f"{args.worker_id}-{i}" if args.worker_id else None, args.output_dir),
+            )
+            for i in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
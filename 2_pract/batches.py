@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+
+class RecordBatch(NamedTuple):
+    """Батч записей одного бюллетеня в колонках между парсингом и записью.
+
+    Поля файла (дата торгов и время загрузки) хранятся один раз на батч, а не в каждой строке.
+    """
+
+    trade_date: date
+    loaded_at: datetime
+    columns: Dict[str, list]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.columns["exchange_product_id"]) if self.columns else 0
+
+    def column(self, name: str) -> Iterable:
+        """Значения колонки; поля файла отдаются через repeat без копирования в каждую строку."""
+        if name == "date":
+            return repeat(self.trade_date, self.row_count)
+        if name in ("created_on", "updated_on"):
+            return repeat(self.loaded_at, self.row_count)
+        return self.columns[name]
+
+    def with_column(self, name: str, values: list) -> "RecordBatch":
+        return self._replace(columns={**self.columns, name: values})
+
+    def rows(self, names: Sequence[str]) -> Iterator[tuple]:
+        """Строки в виде кортежей колонок names — для COPY без промежуточных словарей."""
+        return zip(*(self.column(name) for name in names))
+
+    def to_records(self, names: Sequence[str] = ()) -> List[dict]:
+        """Разворачивает батч в список словарей (по умолчанию все колонки и поля файла)."""
+        names = list(names or [*self.columns, "date", "created_on", "updated_on"])
+        return [dict(zip(names, row)) for row in self.rows(names)]
+
+
+def split_columns(
+    trade_date: date, loaded_at: datetime, columns: Dict[str, list], batch_size: int
+) -> List[RecordBatch]:
+    """Нарезает колонки бюллетеня на батчи не больше batch_size строк."""
+    row_count = len(columns["exchange_product_id"]) if columns else 0
+    return [
+        RecordBatch(trade_date, loaded_at, {name: values[i : i + batch_size] for name, values in columns.items()})
+        for i in range(0, row_count, batch_size)
+    ]
@@ -0,0 +1,121 @@
+import os
+import random
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import xlwt
+
+# Заголовки в том виде, в каком они приходят в бюллетенях (с переносами строк)
+HEADERS = [
+    "Код\nИнструмента",
+    "Наименование\nИнструмента",
+    "Базис\nпоставки",
+    "Объем\nДоговоров\nв единицах\nизмерения",
+    "Обьем\nДоговоров,\nруб.",
+    "Изменение рыночной\nцены к цене\nпредыдуего дня\nРуб.",
+    "Изменение рыночной\nцены к цене\nпредыдуего дня\n%",
+    "Минимальная\nцена\nДоговора,\nруб.",
+    "Средневзвешенная\nцена\nДоговора,\nруб.",
+    "Максимальная\nцена\nДоговора,\nруб.",
+    "Рыночная\nцена,\nруб.",
+    "Лучшее\nпредложение,\nруб.",
+    "Лучший\nспрос,\nруб.",
+    "Количество\nДоговоров,\nшт.",
+]
+OILS = [
+    ("A100", "Бензин (АИ-100-К5)"),
+    ("A092", "Бензин (АИ-92-К5)"),
+    ("A095", "Бензин (АИ-95-К5)"),
+    ("DTL0", "ДТ летнее (ДТ-Л-К5)"),
+    ("DTZ0", "ДТ зимнее (ДТ-З-К5)"),
+    ("M100", "Мазут топочный М-100"),
+    ("TS1A", "Топливо для реактивных двигателей ТС-1"),
+    ("SMO0", "Судовое маловязкое топливо"),
+]
+BASES = [
+    ("ANK", "Ангарск-группа станций"),
+    ("ACH", "Ачинск"),
+    ("KRB", "Кириши"),
+    ("NNK", "Новокуйбышевск"),
+    ("OMS", "Омск"),
+    ("PRM", "Пермь"),
+    ("UFA", "Уфа"),
+    ("YRS", "Ярославль"),
+    ("SZN", "ст. Стенькино II"),
+    ("VNK", "Волгоград"),
+]
+DELIVERY_TYPES = ["A", "F", "J"]
+
+
+def make_products(count: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Формирует устойчивый набор инструментов (код, название, базис поставки)."""
+    rng = random.Random(seed)
+    products = {}
+    while len(products) < count:
+        oil_id, oil_name = rng.choice(OILS)
+        basis_id, basis_name = rng.choice(BASES)
+        code = f"{oil_id}{basis_id}{rng.randint(1, 999):03d}{rng.choice(DELIVERY_TYPES)}"
+        products[code] = (code, f"{oil_name}, {basis_name}", basis_name)
+    return list(products.values())
+
+
+def write_bulletin(file_path: str, trade_date: date, products: List[Tuple[str, str, str]], seed: int = 0) -> None:
+    """Записывает бюллетень в формате .xls с той же разметкой, что у SPIMEX."""
+    rng = random.Random(f"{seed}-{trade_date}")
+    workbook = xlwt.Workbook(encoding="utf-8")
+    sheet = workbook.add_sheet("TRADE_SUMMARY")
+    sheet.write(1, 1, "Бюллетень по итогам торгов в Секции «Нефтепродукты» АО «СПбМТСБ»")
+    sheet.write(3, 1, f"Дата торгов: {trade_date.strftime('%d.%m.%Y')}")
+    sheet.write(5, 1, "Единица измерения: Метрическая тонна")
+    for col, header in enumerate(HEADERS, start=1):
+        sheet.write(6, col, header)
+    for col in range(1, len(HEADERS) + 1):
+        sheet.write(7, col, col)
+
+    row = 8
+    total_volume = total_sum = total_count = 0
+    for code, name, basis_name in products:
+        values = [code, name, basis_name]
+        if rng.random() < 0.3:
+            # Инструмент без сделок: объемы и количество — прочерки
+            values += ["-", "-"] + ["-"] * 8 + ["-"]
+        else:
+            count = rng.randint(1, 40)
+            volume = count * rng.choice([60, 65, 120, 500])
+            price = rng.randint(40_000, 90_000)
+            values += [volume, volume * price, rng.randint(-500, 500), round(rng.uniform(-1, 1), 2)]
+            values += [price - 100, price, price + 100, price, price + 50, price - 50, count]
+            total_volume += volume
+            total_sum += volume * price
+            total_count += count
+        for col, value in enumerate(values, start=1):
+            sheet.write(row, col, value)
+        row += 1
+
+    sheet.write(row, 1, "Итого:")
+    sheet.write(row, 4, total_volume)
+    sheet.write(row, 5, total_sum)
+    sheet.write(row, 14, total_count)
+
+    # Вторая секция после пустой строки парсером не читается
+    sheet.write(row + 2, 1, "Единица измерения: Килограмм")
+    for col, header in enumerate(HEADERS, start=1):
+        sheet.write(row + 3, col, header)
+    workbook.save(file_path)
+
+
+def generate_bulletins(
+    output_dir: str, start_date: date, end_date: date, rows: int, seed: int = 0
+) -> List[Tuple[str, date]]:
+    """Генерирует бюллетени за рабочие дни периода, по rows инструментов в каждом."""
+    os.makedirs(output_dir, exist_ok=True)
+    products = make_products(rows, seed)
+    bulletins = []
+    trade_date = start_date
+    while trade_date <= end_date:
+        if trade_date.weekday() < 5:
+            file_path = os.path.join(output_dir, f"oil_xls_{trade_date.strftime('%Y%m%d')}162000.xls")
+            write_bulletin(file_path, trade_date, products, seed)
+            bulletins.append((file_path, trade_date))
+        trade_date += timedelta(days=1)
+    return bulletins
@@ -0,0 +1,242 @@
+"""Сквозной бенчмарк загрузки бюллетеней на синтетических данных.
+
+Запуск из каталога 2_pract:
+    python -m benchmarks.ingest_bench run --days 60 --rows 300 --output base.json
+    python -m benchmarks.ingest_bench compare base.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.bulletin_factory import generate_bulletins
+from benchmarks.local_postgres import PROJECT_DIR, LocalPostgres
+from benchmarks.spimex_stub import SpimexStub
+from logging_setup import configure_logging
+
+STAGES = ["crawl", "download", "parse", "write", "pipeline"]
+
+
+def summarize(name: str, elapsed: float, latencies: List[float], volume: float = 0.0, unit: str = "") -> dict:
+    """Сводка по стадии: пропускная способность и задержки на элемент."""
+    ordered = sorted(latencies)
+    return {
+        "stage": name,
+        "items": len(latencies),
+        "seconds": elapsed,
+        "items_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "volume": volume,
+        "unit": unit,
+        "volume_per_second": volume / elapsed if elapsed else 0.0,
+        "latency_p50": statistics.median(ordered) if ordered else 0.0,
+        "latency_p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+        "latency_max": ordered[-1] if ordered else 0.0,
+    }
+
+
+async def timed_gather(items, func, concurrency: int) -> List[float]:
+    """Выполняет func для каждого элемента с ограничением параллельности и возвращает задержки."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run(item) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await func(item)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(run(item) for item in items))
+    return latencies
+
+
+async def run_stages(start_date: date, end_date: date, work_dir: str) -> Dict[str, dict]:
+    # Модули проекта импортируются только после настройки окружения (адрес заглушки и базы)
+    import spimex_parser
+    from bulletin_parser import parse_bulletin_compact
+    from config import BATCH_SIZE, DOWNLOAD_CONCURRENCY, WRITE_CONCURRENCY
+    from database import pooled_connection
+    from sqlalchemy import text
+
+    results = {}
+    download_dir = os.path.join(work_dir, "bulletins")
+    os.makedirs(download_dir, exist_ok=True)
+
+    async with spimex_parser.create_http_session() as session:
+        page_latencies = []
+        original_fetch_page = spimex_parser.fetch_page
+
+        async def fetch_page(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original_fetch_page(*args, **kwargs)
+            finally:
+                page_latencies.append(time.perf_counter() - started)
+
+        spimex_parser.fetch_page = fetch_page
+        try:
+            started = time.perf_counter()
+            urls = await spimex_parser.get_bulletin_urls(start_date, end_date, session)
+            results["crawl"] = summarize("crawl", time.perf_counter() - started, page_latencies, len(urls), "bulletins")
+        finally:
+            spimex_parser.fetch_page = original_fetch_page
+
+        downloaded = []
+        sizes = []
+
+        async def download(item) -> None:
+            url, trade_date = item
+            path = os.path.join(download_dir, f"oil_xls_{trade_date.strftime('%Y%m%d')}.xls")
+            size = await spimex_parser.download_bulletin(session, url, path)
+            if size is not None:
+                downloaded.append((path, trade_date))
+                sizes.append(size)
+
+        started = time.perf_counter()
+        latencies = await timed_gather(urls, download, DOWNLOAD_CONCURRENCY)
+        results["download"] = summarize(
+            "download", time.perf_counter() - started, latencies, sum(sizes) / 1024 / 1024, "MB"
+        )
+
+    parsed = []
+    latencies = []
+    started = time.perf_counter()
+    for path, trade_date in downloaded:
+        file_started = time.perf_counter()
+        parsed.append(parse_bulletin_compact(path, trade_date, use_cache=False))
+        latencies.append(time.perf_counter() - file_started)
+    rows = sum(item.row_count for item in parsed)
+    results["parse"] = summarize("parse", time.perf_counter() - started, latencies, rows, "rows")
+
+    await spimex_parser.ensure_partitions(start_date, end_date)
+    await spimex_parser.dimension_cache.load()
+    batches = []
+    for item in parsed:
+        batches.extend(item.to_batches(BATCH_SIZE))
+    started = time.perf_counter()
+    latencies = await timed_gather(batches, spimex_parser.save_batch, WRITE_CONCURRENCY)
+    results["write"] = summarize("write", time.perf_counter() - started, latencies, rows, "rows")
+
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(text("TRUNCATE spimex_trading_results"))
+    started = time.perf_counter()
+    await spimex_parser.process_bulletins(start_date, end_date, os.path.join(work_dir, "pipeline"), resume=False)
+    elapsed = time.perf_counter() - started
+    results["pipeline"] = summarize("pipeline", elapsed, [elapsed], rows, "rows")
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    end_date = date(2025, 5, 9)
+    start_date = end_date - timedelta(days=args.days - 1)
+
+    with tempfile.TemporaryDirectory(prefix="spimex_bench_") as work_dir:
+        bulletins = generate_bulletins(os.path.join(work_dir, "site"), start_date, end_date, args.rows, args.seed)
+        stub = SpimexStub(bulletins, per_page=args.per_page, latency=args.latency_ms / 1000)
+        os.environ["SPIMEX_URL"] = await stub.start()
+        # Заглушка локальная: лимит частоты сайта не должен искажать замер, если не задан явно
+        os.environ.setdefault("HTTP_RATE_LIMIT", "1000")
+        os.environ.setdefault("HTTP_RATE_BURST", "1000")
+
+        postgres = None if args.use_env_db else LocalPostgres()
+        try:
+            if postgres is not None:
+                postgres.start()
+                os.environ.update(postgres.env())
+                postgres.migrate()
+            stages = await run_stages(start_date, end_date, work_dir)
+        finally:
+            await stub.stop()
+            if postgres is not None:
+                postgres.stop()
+
+    return {
+        "revision": git_revision(),
+        "params": {
+            "days": args.days,
+            "bulletins": len(bulletins),
+            "rows": args.rows,
+            "per_page": args.per_page,
+            "latency_ms": args.latency_ms,
+            "stub_requests": stub.requests,
+        },
+        "stages": stages,
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"Ревизия: {result.get('revision')}, параметры: {result['params']}")
+    print(f"{'стадия':<10}{'элементов':>10}{'сек':>10}{'эл/с':>10}{'объем/с':>16}{'p50, мс':>10}{'p95, мс':>10}")
+    for name in STAGES:
+        stage = result["stages"].get(name)
+        if not stage:
+            continue
+        print(
+            f"{name:<10}{stage['items']:>10}{stage['seconds']:>10.2f}{stage['items_per_second']:>10.1f}"
+            f"{stage['volume_per_second']:>11.1f} {stage['unit']:<4}"
+            f"{stage['latency_p50'] * 1000:>10.1f}{stage['latency_p95'] * 1000:>10.1f}"
+        )
+
+
+def compare(base: dict, new: dict) -> None:
+    """Печатает изменение времени и пропускной способности по стадиям между двумя прогонами."""
+    print(f"База: {base.get('revision')}, новый прогон: {new.get('revision')}")
+    if base["params"] != new["params"]:
+        print(f"Внимание: параметры прогонов отличаются: {base['params']} != {new['params']}")
+    print(f"{'стадия':<10}{'база, с':>10}{'новый, с':>10}{'изменение':>12}")
+    for name in STAGES:
+        old_stage, new_stage = base["stages"].get(name), new["stages"].get(name)
+        if not old_stage or not new_stage:
+            continue
+        change = (new_stage["seconds"] - old_stage["seconds"]) / old_stage["seconds"] * 100 if old_stage["seconds"] else 0
+        print(f"{name:<10}{old_stage['seconds']:>10.2f}{new_stage['seconds']:>10.2f}{change:>+11.1f}%")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера загрузки бюллетеней SPIMEX")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="прогнать бенчмарк")
+    run_parser.add_argument("--days", type=int, default=60, help="длина периода в календарных днях")
+    run_parser.add_argument("--rows", type=int, default=300, help="инструментов в бюллетене")
+    run_parser.add_argument("--per-page", type=int, default=10, help="бюллетеней на странице списка")
+    run_parser.add_argument("--latency-ms", type=float, default=20.0, help="задержка ответа заглушки")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--use-env-db", action="store_true", help="использовать базу из .env вместо локальной")
+    run_parser.add_argument("--output", help="файл для результатов в JSON")
+
+    compare_parser = subparsers.add_parser("compare", help="сравнить два прогона")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        with open(args.base, encoding="utf-8") as f_base, open(args.new, encoding="utf-8") as f_new:
+            compare(json.load(f_base), json.load(f_new))
+        return
+
+    configure_logging("spimex_parser.log")
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_pg_binary(name: str) -> str:
+    """Ищет утилиту PostgreSQL в PATH или в каталоге из pg_config --bindir."""
+    path = shutil.which(name)
+    if path:
+        return path
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+        candidate = os.path.join(bindir, name)
+        if os.path.exists(candidate):
+            return candidate
+    raise RuntimeError(f"Не найдена утилита PostgreSQL {name}, установите сервер PostgreSQL")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalPostgres:
+    """Временный кластер PostgreSQL для бенчмарков, запускаемый через initdb и pg_ctl."""
+
+    def __init__(self, db_name: str = "spimex_bench", port: Optional[int] = None) -> None:
+        self.db_name = db_name
+        self.port = port or free_port()
+        self.base_dir = ""
+
+    @property
+    def data_dir(self) -> str:
+        return os.path.join(self.base_dir, "data")
+
+    def env(self) -> Dict[str, str]:
+        """Переменные окружения для config.py."""
+        return {
+            "DB_HOST": "127.0.0.1",
+            "DB_PORT": str(self.port),
+            "DB_USER": "postgres",
+            "DB_PASS": "postgres",
+            "DB_NAME": self.db_name,
+        }
+
+    def start(self) -> None:
+        self.base_dir = tempfile.mkdtemp(prefix="spimex_pg_")
+        subprocess.run(
+            [find_pg_binary("initdb"), "-D", self.data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [
+                find_pg_binary("pg_ctl"),
+                "-D",
+                self.data_dir,
+                "-l",
+                os.path.join(self.base_dir, "postgres.log"),
+                "-o",
+                f"-p {self.port} -k {self.base_dir} -c listen_addresses=127.0.0.1 -c fsync=off",
+                "-w",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [find_pg_binary("createdb"), "-h", "127.0.0.1", "-p", str(self.port), "-U", "postgres", self.db_name],
+            check=True,
+            capture_output=True,
+        )
+
+    def migrate(self) -> None:
+        """Применяет миграции alembic к базе кластера."""
+        subprocess.run(
+            ["alembic", "upgrade", "head"],
+            cwd=PROJECT_DIR,
+            env={**os.environ, **self.env()},
+            check=True,
+            capture_output=True,
+        )
+
+    def stop(self) -> None:
+        if not self.base_dir:
+            return
+        subprocess.run(
+            [find_pg_binary("pg_ctl"), "-D", self.data_dir, "-m", "fast", "-w", "stop"],
+            check=False,
+            capture_output=True,
+        )
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+        self.base_dir = ""
+
+    def __enter__(self) -> "LocalPostgres":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
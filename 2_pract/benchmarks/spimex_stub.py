@@ -0,0 +1,83 @@
+import asyncio
+import os
+from datetime import date
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+
+LISTING_PATH = "/markets/oil_products/trades/results/"
+FILES_PATH = "/upload/reports/oil_xls/"
+
+
+def render_listing(page: int, pages: int, bulletins: List[Tuple[str, date]]) -> str:
+    """Отрисовывает страницу списка бюллетеней с разметкой, как на spimex.com."""
+    items = "\n".join(
+        f'<div class="accordeon-inner__item">'
+        f'<a class="accordeon-inner__item-title link xls" href="{FILES_PATH}{os.path.basename(path)}?r=1">'
+        f"Бюллетень по итогам торгов за {trade_date.strftime('%d.%m.%Y')}</a></div>"
+        for path, trade_date in bulletins
+    )
+    page_items = "".join(
+        f'<li class="bx-active"><span>{n}</span></li>' if n == page else f'<li><a href="?page=page-{n}">{n}</a></li>'
+        for n in range(1, pages + 1)
+    )
+    next_item = (
+        f'<li class="bx-pag-next"><a href="?page=page-{page + 1}">Вперед</a></li>'
+        if page < pages
+        else '<li class="bx-pag-next"><span>Вперед</span></li>'
+    )
+    return (
+        "<html><body><div class=\"accordeon-inner\">"
+        f"{items}</div>"
+        f'<div class="bx-pagination-container"><ul>{page_items}{next_item}</ul></div>'
+        "</body></html>"
+    )
+
+
+class SpimexStub:
+    """Локальная замена spimex.com: страницы списка с пагинацией и файлы бюллетеней."""
+
+    def __init__(self, bulletins: List[Tuple[str, date]], per_page: int = 10, latency: float = 0.0) -> None:
+        # На сайте бюллетени идут от новых к старым
+        self.bulletins = sorted(bulletins, key=lambda item: item[1], reverse=True)
+        self.files = {os.path.basename(path): path for path, _ in bulletins}
+        self.per_page = per_page
+        self.latency = latency
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.bulletins) // self.per_page))
+
+    async def listing(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        page_param = request.query.get("page", "page-1")
+        page = int(page_param.removeprefix("page-")) if page_param.startswith("page-") else 1
+        chunk = self.bulletins[(page - 1) * self.per_page : page * self.per_page]
+        return web.Response(text=render_listing(page, self.pages, chunk), content_type="text/html")
+
+    async def bulletin(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        path = self.files.get(request.match_info["name"])
+        if path is None:
+            raise web.HTTPNotFound()
+        return web.FileResponse(path)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запускает сервер и возвращает его адрес."""
+        app = web.Application()
+        app.router.add_get(LISTING_PATH, self.listing)
+        app.router.add_get(FILES_PATH + "{name}", self.bulletin)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,136 @@
+"""Бенчмарк времени запуска: сколько стоит импорт точек входа и модулей стадий.
+
+Каждый модуль импортируется в отдельном чистом процессе, из времени вычитается
+запуск пустого интерпретатора. Запуск из каталога 2_pract:
+    python -m benchmarks.startup_bench run --repeat 10 --output base.json
+    python -m benchmarks.startup_bench compare base.json new.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.ingest_bench import git_revision
+from benchmarks.local_postgres import PROJECT_DIR
+
+MODULES = ["main", "backfill", "aggregates", "poller", "queries", "spimex_parser", "database", "bulletin_parser"]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def measure(code: str, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_python(code)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def top_level_imports(code: str) -> Dict[str, int]:
+    """Пакеты верхнего уровня и их кумулятивное время импорта в мкс по выводу -X importtime."""
+    output = run_python(code, "-X", "importtime").stderr
+    packages: Dict[str, int] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        # После разделителя один пробел; вложенные импорты идут с дополнительным отступом
+        name = name[1:].rstrip()
+        cumulative = cumulative.strip()
+        if cumulative.isdigit() and not name.startswith(" ") and "." not in name:
+            packages[name] = max(packages.get(name, 0), int(cumulative))
+    return packages
+
+
+def heaviest_imports(module: str, limit: int) -> List[dict]:
+    """Самые дорогие пакеты, которых нет в запуске пустого интерпретатора."""
+    interpreter = top_level_imports("pass")
+    packages = {name: micros for name, micros in top_level_imports(f"import {module}").items() if name not in interpreter}
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"package": name, "ms": micros / 1000} for name, micros in ranked]
+
+
+def run_benchmark(modules: List[str], repeat: int, top: int) -> dict:
+    baseline = statistics.median(measure("pass", repeat))
+    results = {}
+    for module in modules:
+        try:
+            timings = measure(f"import {module}", repeat)
+        except subprocess.CalledProcessError as e:
+            results[module] = {"error": e.stderr.strip().splitlines()[-1] if e.stderr else str(e)}
+            continue
+        results[module] = {
+            "seconds": max(statistics.median(timings) - baseline, 0.0),
+            "seconds_max": max(timings) - baseline,
+            "heaviest": heaviest_imports(module, top),
+        }
+    return {
+        "revision": git_revision(),
+        "params": {"repeat": repeat, "python": sys.version.split()[0]},
+        "interpreter_seconds": baseline,
+        "modules": results,
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"Ревизия: {result.get('revision')}, параметры: {result['params']}")
+    print(f"Запуск пустого интерпретатора: {result['interpreter_seconds'] * 1000:.1f} мс")
+    print(f"{'модуль':<18}{'импорт, мс':>12}  самые дорогие пакеты")
+    for module, stats in result["modules"].items():
+        if "error" in stats:
+            print(f"{module:<18}{'ошибка':>12}  {stats['error']}")
+            continue
+        heaviest = ", ".join(f"{item['package']} {item['ms']:.0f}" for item in stats["heaviest"])
+        print(f"{module:<18}{stats['seconds'] * 1000:>12.1f}  {heaviest}")
+
+
+def compare(base: dict, new: dict) -> None:
+    """Печатает изменение времени импорта модулей между двумя прогонами."""
+    print(f"База: {base.get('revision')}, новый прогон: {new.get('revision')}")
+    print(f"{'модуль':<18}{'база, мс':>10}{'новый, мс':>11}{'изменение':>12}")
+    for module, new_stats in new["modules"].items():
+        old_stats = base["modules"].get(module)
+        if not old_stats or "seconds" not in old_stats or "seconds" not in new_stats:
+            continue
+        old_seconds, new_seconds = old_stats["seconds"], new_stats["seconds"]
+        change = (new_seconds - old_seconds) / old_seconds * 100 if old_seconds else 0
+        print(f"{module:<18}{old_seconds * 1000:>10.1f}{new_seconds * 1000:>11.1f}{change:>+11.1f}%")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска модулей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="замерить время импорта")
+    run_parser.add_argument("modules", nargs="*", default=MODULES, help="модули, по умолчанию точки входа и стадии")
+    run_parser.add_argument("--repeat", type=int, default=10, help="повторов на модуль")
+    run_parser.add_argument("--top", type=int, default=5, help="сколько самых дорогих пакетов показать")
+    run_parser.add_argument("--output", help="файл для результатов в JSON")
+
+    compare_parser = subparsers.add_parser("compare", help="сравнить два прогона")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        with open(args.base, encoding="utf-8") as f_base, open(args.new, encoding="utf-8") as f_new:
+            compare(json.load(f_base), json.load(f_new))
+        return
+
+    result = run_benchmark(args.modules, args.repeat, args.top)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
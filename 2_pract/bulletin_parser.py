@@ -0,0 +1,165 @@
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+from batches import RecordBatch, split_columns
+from config import PARSE_CACHE_DIR, PARSE_CACHE_ENABLED, PARSE_CACHE_MAX_MB, XLS_READER
+from parse_cache import ParseCache
+from pydantic import BaseModel, Field, ValidationError, computed_field
+from readers import BulletinFormatError, read_bulletin_table
+
+logger = logging.getLogger(__name__)
+
+
+class TradingResultModel(BaseModel):
+    exchange_product_id: str = Field(..., alias="Код Инструмента")
+    exchange_product_name: str = Field(..., alias="Наименование Инструмента")
+    delivery_basis_name: str = Field(..., alias="Базис поставки")
+    volume: float = Field(..., alias="Объем Договоров в единицах измерения")
+    total: float = Field(..., alias="Обьем Договоров, руб.")
+    count: int = Field(..., alias="Количество Договоров, шт.")
+    date: date
+    created_on: datetime
+    updated_on: datetime
+
+    @computed_field
+    @property
+    def oil_id(self) -> str:
+        return self.exchange_product_id[:4]
+
+    @computed_field
+    @property
+    def delivery_basis_id(self) -> str:
+        return self.exchange_product_id[4:7]
+
+    @computed_field
+    @property
+    def delivery_type_id(self) -> str:
+        return self.exchange_product_id[-1]
+
+
+# Увеличивается при любом изменении результата парсинга, чтобы не использовать устаревший кэш
+PARSER_VERSION = 4
+
+REQUIRED_COLUMNS = {
+    "Код Инструмента": "exchange_product_id",
+    "Наименование Инструмента": "exchange_product_name",
+    "Базис поставки": "delivery_basis_name",
+    "Объем Договоров в единицах измерения": "volume",
+    "Обьем Договоров, руб.": "total",
+    "Количество Договоров, шт.": "count",
+}
+NUMERIC_COLUMNS = ["Объем Договоров в единицах измерения", "Обьем Договоров, руб.", "Количество Договоров, шт."]
+TEXT_COLUMNS = ["Код Инструмента", "Наименование Инструмента", "Базис поставки"]
+
+
+class ParsedBulletin(NamedTuple):
+    """Результат парсинга бюллетеня в колоночном виде, без повторяющихся полей файла."""
+
+    file_path: str
+    trade_date: date
+    columns: Dict[str, list]
+    # Причина, по которой бюллетень не разобран; None — разобран (возможно, без строк)
+    error: Optional[str] = None
+
+    @property
+    def row_count(self) -> int:
+        return len(self.columns["exchange_product_id"]) if self.columns else 0
+
+    def to_batches(self, batch_size: int) -> List[RecordBatch]:
+        """Нарезает колонки на батчи для стадии записи; время загрузки одно на весь бюллетень."""
+        return split_columns(self.trade_date, datetime.now(), self.columns, batch_size)
+
+    def to_records(self) -> List[dict]:
+        """Разворачивает колонки в список словарей."""
+        return RecordBatch(self.trade_date, datetime.now(), self.columns).to_records()
+
+
+def report_invalid_rows(data_df: pd.DataFrame, file_path: str, trade_date: date) -> None:
+    """Логирует ошибки схемы для невалидных строк через TradingResultModel."""
+    current_time = datetime.now()
+    for row in data_df.to_dict(orient="records"):
+        try:
+            TradingResultModel.model_validate(
+                {**row, "date": trade_date, "created_on": current_time, "updated_on": current_time}
+            )
+        except ValidationError as e:
+            logger.error(f"Ошибка схемы в {file_path}, строка {row.get('Код Инструмента')!r}: {e}")
+
+
+def parse_bulletin_frame(file_path: str, trade_date: date, content: Optional[bytes] = None) -> pd.DataFrame:
+    """Парсит Excel-бюллетень колоночными операциями и возвращает DataFrame с полями модели.
+
+    Если бюллетень не соответствует разметке или схеме, выбрасывает BulletinFormatError.
+    """
+    data_df = read_bulletin_table(file_path, list(REQUIRED_COLUMNS), XLS_READER, content)
+    if data_df.empty:
+        raise BulletinFormatError("нет данных после строки с заголовками")
+
+    data_df = data_df.assign(
+        **{col: pd.to_numeric(data_df[col].replace("-", pd.NA), errors="coerce").fillna(0) for col in NUMERIC_COLUMNS}
+    )
+    data_df = data_df[data_df["Количество Договоров, шт."] > 0]
+    data_df = data_df[~data_df["Код Инструмента"].astype("string").str.contains("Итог", case=False, na=False)]
+
+    invalid = data_df["Количество Договоров, шт."].mod(1).ne(0)
+    for col in TEXT_COLUMNS:
+        invalid |= ~data_df[col].map(type).eq(str)
+    if invalid.any():
+        report_invalid_rows(data_df[invalid], file_path, trade_date)
+        raise BulletinFormatError(f"{int(invalid.sum())} строк не прошли проверку схемы")
+
+    data_df = data_df.rename(columns=REQUIRED_COLUMNS)
+    data_df["count"] = data_df["count"].astype("int64")
+    product_ids = data_df["exchange_product_id"].str
+    data_df["oil_id"] = product_ids[:4]
+    data_df["delivery_basis_id"] = product_ids[4:7]
+    data_df["delivery_type_id"] = product_ids[-1]
+    return data_df.reset_index(drop=True)
+
+
+def get_parse_cache(file_path: str) -> ParseCache:
+    """Возвращает кэш парсинга, лежащий рядом с загруженными бюллетенями."""
+    cache_dir = os.path.join(os.path.dirname(file_path), PARSE_CACHE_DIR)
+    # Движки читают файл по-разному, поэтому результат одного не подставляется вместо другого
+    return ParseCache(cache_dir, PARSER_VERSION, PARSE_CACHE_MAX_MB * 1024 * 1024, XLS_READER)
+
+
+def parse_bulletin_compact(
+    file_path: str, trade_date: date, use_cache: bool = PARSE_CACHE_ENABLED, content: Optional[bytes] = None
+) -> ParsedBulletin:
+    """Парсит бюллетень и упаковывает записи в колонки для передачи между процессами.
+
+    Если передано content, бюллетень разбирается из памяти без чтения file_path с диска.
+    Если файл с таким содержимым уже разбирался текущей версией парсера, колонки берутся из кэша.
+    """
+    cache = get_parse_cache(file_path) if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(file_path, content)
+        columns = cache.get(cache_key)
+        if columns is not None:
+            logger.info(f"Взято из кэша {len(columns.get('exchange_product_id', []))} записей для {file_path}")
+            return ParsedBulletin(file_path, trade_date, columns)
+
+    try:
+        data_df = parse_bulletin_frame(file_path, trade_date, content)
+    except BulletinFormatError as e:
+        logger.error(f"Неверный формат {file_path}: {e}")
+        return ParsedBulletin(file_path, trade_date, {}, f"Неверный формат: {e}")
+    except Exception as e:
+        logger.error(f"Ошибка при парсинге {file_path}: {e}")
+        return ParsedBulletin(file_path, trade_date, {}, f"Ошибка при парсинге: {e}")
+
+    logger.info(f"Спарсено {len(data_df)} записей из {file_path}")
+    columns = {name: data_df[name].tolist() for name in data_df.columns}
+    if cache is not None:
+        cache.put(cache_key, columns)
+    return ParsedBulletin(file_path, trade_date, columns)
+
+
+def parse_bulletin(file_path: str, trade_date: date) -> List[dict]:
+    """Парсит Excel-бюллетень и возвращает список словарей."""
+    return parse_bulletin_compact(file_path, trade_date).to_records()
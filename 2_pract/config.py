@@ -10,6 +10,89 @@ DB_PORT = os.environ.get("DB_PORT")
 DB_USER = os.environ.get("DB_USER")
 DB_PASS = os.environ.get("DB_PASS")
 
+# Пул соединений асинхронного движка
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+
+# Параметры HTTP-клиента и краулера
+SPIMEX_URL = os.environ.get("SPIMEX_URL", "https://spimex.com").rstrip("/")
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 16))
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 4))
+DOWNLOAD_CONCURRENCY = int(os.environ.get("DOWNLOAD_CONCURRENCY", 8))
+
+# Регулятор запросов к spimex.com: общий лимит частоты (token bucket), адаптивная параллельность
+# (AIMD), повторы с экспоненциальной задержкой и предохранитель, останавливающий запросы при сбоях сайта
+HTTP_RATE_LIMIT = float(os.environ.get("HTTP_RATE_LIMIT", 5.0))
+HTTP_RATE_BURST = int(os.environ.get("HTTP_RATE_BURST", 10))
+HTTP_MIN_CONCURRENCY = int(os.environ.get("HTTP_MIN_CONCURRENCY", 1))
+HTTP_LATENCY_THRESHOLD = float(os.environ.get("HTTP_LATENCY_THRESHOLD", 5.0))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 5))
+HTTP_BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", 1.0))
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", 60.0))
+HTTP_BREAKER_THRESHOLD = int(os.environ.get("HTTP_BREAKER_THRESHOLD", 5))
+HTTP_BREAKER_COOLDOWN = float(os.environ.get("HTTP_BREAKER_COOLDOWN", 60.0))
+
+# Параллельный парсинг бюллетеней в пуле процессов (по умолчанию выключен)
+PARALLEL_PARSE = os.environ.get("PARALLEL_PARSE", "false").lower() in ("1", "true", "yes")
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS") or os.cpu_count() or 1)
+
+# Движок чтения xls: "calamine" (python-calamine), "xlrd" (потоковое чтение ячеек) или "pandas" (pd.read_excel)
+XLS_READER = os.environ.get("XLS_READER", "calamine").lower()
+
+# Кэш результатов парсинга (Parquet) рядом с загруженными бюллетенями
+PARSE_CACHE_ENABLED = os.environ.get("PARSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PARSE_CACHE_DIR = os.environ.get("PARSE_CACHE_DIR", ".parsed")
+PARSE_CACHE_MAX_MB = int(os.environ.get("PARSE_CACHE_MAX_MB", 512))
+
+# Потоковый конвейер: размер очередей между стадиями, батчи и параллельность записи
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 32))
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", 1000))
+WRITE_CONCURRENCY = int(os.environ.get("WRITE_CONCURRENCY", 4))
+
+# Способ записи в базу: "copy" (бинарный COPY asyncpg) или "insert" (INSERT ... VALUES).
+# При WRITE_UPSERT повторная загрузка строки обновляет ее по ключу (дата, инструмент)
+WRITE_METHOD = os.environ.get("WRITE_METHOD", "copy").lower()
+WRITE_UPSERT = os.environ.get("WRITE_UPSERT", "true").lower() in ("1", "true", "yes")
+
+# На сколько месяцев вперед создавать партиции spimex_trading_results перед загрузкой
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+
+# Кэш запросов к результатам торгов: сбрасывается по завершении загрузки, TTL — страховка
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 24 * 60 * 60))
+
+# Выгрузка метрик запуска: текстовый формат Prometheus (textfile collector) и JSON-сводка
+METRICS_PROM_FILE = os.environ.get("METRICS_PROM_FILE", "metrics/spimex_ingest.prom")
+METRICS_SUMMARY_FILE = os.environ.get("METRICS_SUMMARY_FILE", "metrics/run_summary.json")
+
+# Распределенная догрузка истории: размер шарда в днях, аренда шарда воркером и ее продление
+BACKFILL_SHARD_DAYS = int(os.environ.get("BACKFILL_SHARD_DAYS", 30))
+BACKFILL_LEASE_SECONDS = int(os.environ.get("BACKFILL_LEASE_SECONDS", 600))
+BACKFILL_HEARTBEAT_SECONDS = int(os.environ.get("BACKFILL_HEARTBEAT_SECONDS", 60))
+BACKFILL_MAX_ATTEMPTS = int(os.environ.get("BACKFILL_MAX_ATTEMPTS", 5))
+
+# Режим демона: опрос первой страницы списка бюллетеней. В окне публикации (время биржи)
+# опрос идет чаще; при ошибках интервал растет экспоненциально до POLL_MAX_BACKOFF
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", 30 * 60))
+POLL_FAST_INTERVAL = float(os.environ.get("POLL_FAST_INTERVAL", 2 * 60))
+POLL_MAX_BACKOFF = float(os.environ.get("POLL_MAX_BACKOFF", 60 * 60))
+POLL_JITTER = float(os.environ.get("POLL_JITTER", 0.1))
+POLL_TIMEZONE = os.environ.get("POLL_TIMEZONE", "Europe/Moscow")
+POLL_WINDOW_START = os.environ.get("POLL_WINDOW_START", "14:30")
+POLL_WINDOW_END = os.environ.get("POLL_WINDOW_END", "19:30")
+POLL_HEALTH_HOST = os.environ.get("POLL_HEALTH_HOST", "0.0.0.0")
+POLL_HEALTH_PORT = int(os.environ.get("POLL_HEALTH_PORT", 8080))
+
+# Журнал загрузки bulletin_manifest: при повторном запуске пропускать уже загруженные бюллетени
+INGEST_RESUME = os.environ.get("INGEST_RESUME", "true").lower() in ("1", "true", "yes")
+
+# Хранение исходных бюллетеней: files — .xls в каталоге загрузки, archive — бюллетень
+# разбирается прямо из памяти, а исходник дописывается в помесячный zstd-бандл ARCHIVE_DIR
+BULLETIN_STORAGE = os.environ.get("BULLETIN_STORAGE", "files")
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "bulletins/archive")
+ARCHIVE_ZSTD_LEVEL = int(os.environ.get("ARCHIVE_ZSTD_LEVEL", 10))
+
 # Отладочный вывод
 if __name__ == "__main__":
     print(f"DB_NAME: {DB_NAME}")
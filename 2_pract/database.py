@@ -1,42 +1,140 @@
+import functools
 import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
-from models import BaseModel
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from config import DB_HOST, DB_MAX_OVERFLOW, DB_NAME, DB_PASS, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_PORT, DB_USER
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("database.log", encoding="utf-8"), logging.StreamHandler()],
-)
 logger = logging.getLogger(__name__)
 
 
-SYNC_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Строка подключения libpq: ее понимают и psycopg2, и asyncpg для выделенных соединений
+POSTGRES_DSN = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+SYNC_DATABASE_URL = POSTGRES_DSN
 
 ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-try:
-    # Синхронный движок для создания таблиц и проверок
-    sync_engine = create_engine(SYNC_DATABASE_URL, pool_pre_ping=True)
-    # BaseModel.metadata.create_all(sync_engine, checkfirst=True)
-    logger.info("Таблицы созданы или уже существуют")
+DATABASE_URL = SYNC_DATABASE_URL
+
 
-    # Асинхронный движок для работы с данными
-    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+@functools.cache
+def get_sync_engine() -> Engine:
+    """Синхронный движок для создания таблиц и проверок; создается при первом обращении."""
+    return create_engine(SYNC_DATABASE_URL, pool_pre_ping=True)
 
-    Session = sessionmaker(bind=sync_engine)
 
-    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+@functools.cache
+def get_async_engine() -> AsyncEngine:
+    """Асинхронный движок для работы с данными; создается при первом обращении."""
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+    event.listen(engine.sync_engine, "checkout", _on_checkout)
+    return engine
 
-    if not Session.kw.get("bind"):
-        logger.error("Синхронная сессия не привязана к движку")
-        raise ValueError("Синхронная сессия не привязана к движку")
 
-except Exception as e:
-    logger.error(f"Ошибка подключения к базе данных: {e}")
-    raise
+@functools.cache
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(bind=get_sync_engine())
 
-DATABASE_URL = SYNC_DATABASE_URL
+
+@functools.cache
+def get_async_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(get_async_engine(), class_=AsyncSession, expire_on_commit=False)
+
+
+# Прежние имена модуля остаются доступными, но движки создаются только при обращении к ним
+_LAZY_ATTRIBUTES = {
+    "sync_engine": get_sync_engine,
+    "async_engine": get_async_engine,
+    "Session": get_sessionmaker,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class PoolMetrics:
+    """Метрики пула асинхронного движка: ожидание соединения, занятые соединения и overflow."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use_max = 0
+        self.overflow_max = 0
+
+    def record_checkout(self) -> None:
+        pool = get_async_engine().sync_engine.pool
+        self.checkouts += 1
+        self.in_use_max = max(self.in_use_max, pool.checkedout())
+        self.overflow_max = max(self.overflow_max, pool.overflow())
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self) -> dict:
+        pool = get_async_engine().sync_engine.pool
+        return {
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "in_use_max": self.in_use_max,
+            "overflow_max": self.overflow_max,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg": self.wait_total / self.checkouts if self.checkouts else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    pool_metrics.record_checkout()
+
+
+def pool_capacity() -> int:
+    """Максимальное число одновременно выданных соединений асинхронного пула."""
+    return DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+@asynccontextmanager
+async def pooled_connection() -> AsyncIterator[AsyncConnection]:
+    """Выдает соединение из пула, замеряя время ожидания и таймауты."""
+    started = time.perf_counter()
+    try:
+        async with get_async_engine().connect() as conn:
+            pool_metrics.record_wait(time.perf_counter() - started)
+            yield conn
+    except PoolTimeoutError:
+        pool_metrics.timeouts += 1
+        raise
+
+
+def log_pool_metrics() -> None:
+    """Пишет в лог текущие метрики пула соединений."""
+    metrics = pool_metrics.snapshot()
+    logger.info(
+        f"Пул соединений: занято {metrics['in_use']}/{metrics['pool_size']} (максимум {metrics['in_use_max']}), "
+        f"overflow максимум {metrics['overflow_max']}, выдач {metrics['checkouts']}, таймаутов {metrics['timeouts']}, "
+        f"ожидание среднее {metrics['wait_avg'] * 1000:.1f} мс, максимальное {metrics['wait_max'] * 1000:.1f} мс"
+    )
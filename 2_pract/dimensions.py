@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from batches import RecordBatch
+from database import pooled_connection
+from models import DeliveryBasis, Instrument
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+# Колонки батча, нужные для добавления инструмента и базиса в справочники
+INSTRUMENT_COLUMNS = ["exchange_product_id", "exchange_product_name", "delivery_basis_name", "delivery_basis_id"]
+
+
+class DimensionCache:
+    """Кэш ключей справочников инструментов и базисов поставки на время запуска."""
+
+    def __init__(self) -> None:
+        self.instruments: Dict[str, int] = {}
+        self.delivery_bases: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        """Загружает справочники из базы целиком."""
+        async with pooled_connection() as conn:
+            bases = await conn.execute(select(DeliveryBasis.name, DeliveryBasis.id))
+            self.delivery_bases = dict(bases.all())
+            instruments = await conn.execute(select(Instrument.exchange_product_id, Instrument.id))
+            self.instruments = dict(instruments.all())
+        logger.info(
+            f"Загружены справочники: {len(self.instruments)} инструментов, {len(self.delivery_bases)} базисов"
+        )
+
+    async def resolve(self, batch: RecordBatch) -> List[int]:
+        """Возвращает ключи инструментов для строк батча, добавляя новые в справочники."""
+        product_ids = batch.columns["exchange_product_id"]
+        if any(product_id not in self.instruments for product_id in product_ids):
+            # Новые инструменты добавляются под блокировкой, чтобы параллельные батчи не дублировали вставку
+            async with self._lock:
+                missing = {
+                    row["exchange_product_id"]: row
+                    for row in batch.to_records(INSTRUMENT_COLUMNS)
+                    if row["exchange_product_id"] not in self.instruments
+                }
+                if missing:
+                    await self._add_instruments(list(missing.values()))
+        return [self.instruments[product_id] for product_id in product_ids]
+
+    async def _add_instruments(self, rows: List[dict]) -> None:
+        # Ключи попадают в кэш только после фиксации транзакции: при откате в кэше не останется
+        # идентификаторов, которых нет в базе
+        async with pooled_connection() as conn, conn.begin():
+            new_bases = {
+                row["delivery_basis_name"]: row["delivery_basis_id"]
+                for row in rows
+                if row["delivery_basis_name"] not in self.delivery_bases
+            }
+            bases = await insert_missing(
+                conn,
+                DeliveryBasis,
+                "name",
+                [{"name": name, "code": code} for name, code in new_bases.items()],
+                "uq_delivery_bases_name",
+            )
+            base_ids = {**self.delivery_bases, **bases}
+
+            values = [
+                {
+                    "exchange_product_id": row["exchange_product_id"],
+                    "exchange_product_name": row["exchange_product_name"],
+                    "delivery_base_id": base_ids[row["delivery_basis_name"]],
+                }
+                for row in rows
+            ]
+            instruments = await insert_missing(
+                conn, Instrument, "exchange_product_id", values, "uq_instruments_exchange_product_id"
+            )
+            # Инструменты, уже добавленные другими запусками, получают последнее название и базис
+            stmt = (
+                update(Instrument)
+                .where(
+                    Instrument.exchange_product_id == bindparam("b_product_id"),
+                    or_(
+                        Instrument.exchange_product_name != bindparam("b_name"),
+                        Instrument.delivery_base_id != bindparam("b_base_id"),
+                    ),
+                )
+                .values(exchange_product_name=bindparam("b_name"), delivery_base_id=bindparam("b_base_id"))
+            )
+            await conn.execute(
+                stmt,
+                [
+                    {
+                        "b_product_id": value["exchange_product_id"],
+                        "b_name": value["exchange_product_name"],
+                        "b_base_id": value["delivery_base_id"],
+                    }
+                    for value in values
+                ],
+            )
+        self.delivery_bases.update(bases)
+        self.instruments.update(instruments)
+        logger.info(f"Добавлено {len(rows)} новых инструментов в справочник")
+
+
+async def insert_missing(
+    conn: AsyncConnection, model: type, key: str, values: List[dict], constraint: str
+) -> Dict[str, int]:
+    """Возвращает идентификаторы строк values по колонке key, вставляя только отсутствующие.
+
+    Ключи справочников — SMALLSERIAL, а вставка с конфликтом тратит значение последовательности
+    даже при ON CONFLICT DO NOTHING. Поэтому существующие строки сначала выбираются, и конфликт
+    (DO NOTHING и повторный SELECT) возможен только при гонке с другим воркером.
+    """
+    if not values:
+        return {}
+    column = getattr(model, key)
+    ids = dict((await conn.execute(select(column, model.id).where(column.in_([v[key] for v in values])))).all())
+    missing = [value for value in values if value[key] not in ids]
+    if missing:
+        stmt = insert(model).values(missing).on_conflict_do_nothing(constraint=constraint).returning(column, model.id)
+        ids.update((await conn.execute(stmt)).all())
+        raced = [value[key] for value in missing if value[key] not in ids]
+        if raced:
+            ids.update((await conn.execute(select(column, model.id).where(column.in_(raced)))).all())
+    return ids
+
+
+dimension_cache = DimensionCache()
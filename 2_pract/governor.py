@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+from config import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_BREAKER_COOLDOWN,
+    HTTP_BREAKER_THRESHOLD,
+    HTTP_LATENCY_THRESHOLD,
+    HTTP_MIN_CONCURRENCY,
+    HTTP_POOL_SIZE,
+    HTTP_RATE_BURST,
+    HTTP_RATE_LIMIT,
+    HTTP_RETRIES,
+)
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Ограничение частоты запросов: rate токенов в секунду, не больше burst подряд."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """Лимит одновременных запросов по AIMD: растет на 1 за «окно» успешных ответов и делится пополам при перегрузке.
+
+    Снижение — не чаще раза за время ответа: запросы, отправленные до последнего снижения,
+    относятся к той же перегрузке и лимит повторно не уменьшают.
+    """
+
+    def __init__(self, min_limit: int, max_limit: int) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.decreased_at = float("-inf")
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def condition(self) -> asyncio.Condition:
+        # Регулятор общий для процесса, а циклов событий может быть несколько подряд (asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self.in_flight = 0
+        return self._condition
+
+    async def __aenter__(self) -> None:
+        condition = self.condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info) -> None:
+        condition = self.condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def increase(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def decrease(self, started: float) -> None:
+        """Снижает лимит по сигналу перегрузки от запроса, отправленного в момент started (time.monotonic)."""
+        if started <= self.decreased_at:
+            return
+        self.decreased_at = time.monotonic()
+        previous = int(self.limit)
+        self.limit = max(self.min_limit, self.limit / 2)
+        if int(self.limit) < previous:
+            logger.info(f"Параллельность запросов снижена до {int(self.limit)}")
+
+
+class CircuitBreaker:
+    """Предохранитель: после threshold сбоев подряд все запросы ждут cooldown, затем проходит один пробный."""
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    async def wait(self) -> None:
+        """Ждет, пока предохранитель пропустит запрос."""
+        while True:
+            delay = self.open_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if not self.is_open:
+                return
+            # Полуоткрытое состояние: один пробный запрос, остальные ждут его исхода
+            if not self.probing:
+                self.probing = True
+                return
+            await asyncio.sleep(min(1.0, self.cooldown))
+
+    def pause(self, seconds: float) -> None:
+        """Приостанавливает все запросы, например по Retry-After."""
+        self.open_until = max(self.open_until, time.monotonic() + seconds)
+
+    def record_success(self) -> None:
+        if self.is_open:
+            logger.info("Сайт снова отвечает, запросы возобновлены")
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.failures == self.threshold:
+            metrics.circuit_opened.inc()
+        if self.is_open:
+            logger.warning(f"Сайт недоступен ({self.failures} сбоев подряд), запросы приостановлены на {self.cooldown:.0f} с")
+            self.pause(self.cooldown)
+
+
+def backoff_delay(attempt: int, base: float = HTTP_BACKOFF_BASE, cap: float = HTTP_BACKOFF_MAX) -> float:
+    """Экспоненциальная задержка с полным джиттером."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_after(error: aiohttp.ClientResponseError) -> Optional[float]:
+    """Значение заголовка Retry-After в секундах, если он есть."""
+    value = (error.headers or {}).get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestTiming:
+    """Время ответа на запрос: до получения заголовков, если request их отметил, иначе до его конца.
+
+    Тело большого бюллетеня качается долго и при свободном сайте, поэтому для AIMD важно
+    время до заголовков, а не полная длительность загрузки.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.headers_at: Optional[float] = None
+
+    def headers_received(self) -> None:
+        if self.headers_at is None:
+            self.headers_at = time.monotonic()
+
+    @property
+    def latency(self) -> float:
+        return (self.headers_at or time.monotonic()) - self.started
+
+
+class RequestGovernor:
+    """Общий регулятор исходящих запросов к сайту биржи."""
+
+    def __init__(
+        self,
+        rate: float = HTTP_RATE_LIMIT,
+        burst: int = HTTP_RATE_BURST,
+        min_concurrency: int = HTTP_MIN_CONCURRENCY,
+        max_concurrency: int = HTTP_POOL_SIZE,
+        latency_threshold: float = HTTP_LATENCY_THRESHOLD,
+        retries: int = HTTP_RETRIES,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(min_concurrency, max_concurrency)
+        self.breaker = CircuitBreaker(HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_COOLDOWN)
+        self.latency_threshold = latency_threshold
+        self.retries = retries
+
+    async def run(
+        self,
+        operation: str,
+        url: str,
+        request: Callable[[Callable[[], None]], Awaitable[T]],
+        retries: Optional[int] = None,
+    ) -> T:
+        """Выполняет request с учетом лимитов и повторяет его при временных сбоях.
+
+        request получает функцию, которую вызывает сразу после получения заголовков ответа:
+        задержка до этого момента и служит сигналом перегрузки.
+        Ошибки клиента (4xx, кроме 429) и ошибки вне HTTP пробрасываются сразу.
+        """
+        retries = retries or self.retries
+        attempt = 0
+        while True:
+            await self.breaker.wait()
+            await self.bucket.acquire()
+            delay = None
+            async with self.limiter:
+                timing = RequestTiming()
+                started = timing.started
+                try:
+                    result = await request(timing.headers_received)
+                except aiohttp.ClientResponseError as e:
+                    if e.status in THROTTLE_STATUSES:
+                        metrics.throttled.inc(operation=operation)
+                        self.limiter.decrease(started)
+                        delay = retry_after(e)
+                        if delay is not None:
+                            self.breaker.pause(delay)
+                    elif e.status < 500:
+                        # Сайт отвечает, просто такого ресурса нет: повторять бессмысленно
+                        self.breaker.record_success()
+                        raise
+                    error = e
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = e
+                except BaseException:
+                    self.breaker.probing = False
+                    raise
+                else:
+                    if timing.latency > self.latency_threshold:
+                        self.limiter.decrease(started)
+                    else:
+                        self.limiter.increase()
+                    self.breaker.record_success()
+                    return result
+
+            self.breaker.record_failure()
+            attempt += 1
+            logger.warning(f"Попытка {attempt} не удалась для {url}: {error}")
+            if attempt >= retries:
+                raise error
+            metrics.retries.inc(operation=operation)
+            await asyncio.sleep(delay if delay is not None else backoff_delay(attempt - 1))
+
+
+governor = RequestGovernor()
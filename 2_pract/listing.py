@@ -0,0 +1,106 @@
+import logging
+from datetime import date, datetime
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional, Tuple
+
+from config import SPIMEX_URL
+
+logger = logging.getLogger(__name__)
+
+# Как class_ в BeautifulSoup: строка из нескольких классов совпадает только целиком и в том же порядке
+LINK_CLASS = "accordeon-inner__item-title link xls"
+PAGINATION_CLASS = "bx-pagination-container"
+NEXT_PAGE_CLASS = "bx-pag-next"
+BULLETIN_PATH = "/upload/reports/oil_xls/oil_xls_"
+
+
+class Listing(NamedTuple):
+    """Содержимое страницы списка бюллетеней."""
+
+    links: List[Tuple[str, date]]
+    max_pages: int
+    has_next: bool
+
+
+def bulletin_link(href: str) -> Optional[Tuple[str, date]]:
+    """Возвращает (полный URL, дата торгов) для ссылки на бюллетень или None."""
+    href = href.split("?")[0]
+    if BULLETIN_PATH not in href or not href.endswith(".xls"):
+        logger.debug(f"Пропущена ссылка {href}: не соответствует шаблону oil_xls_")
+        return None
+    try:
+        file_date = datetime.strptime(href.split("oil_xls_")[1][:8], "%Y%m%d").date()
+    except (IndexError, ValueError) as e:
+        logger.warning(f"Не удалось извлечь дату из ссылки {href}: {e}")
+        return None
+    return (href if href.startswith("http") else f"{SPIMEX_URL}{href}", file_date)
+
+
+class ListingParser(HTMLParser):
+    """Потоковый разбор страницы списка: ссылки на бюллетени и пагинация за один проход, без дерева."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.links: List[Tuple[str, date]] = []
+        self.page_items: List[str] = []
+        self.has_next = False
+        # Глубина вложенности div внутри блока пагинации; 0 — вне блока.
+        # Как и soup.find, учитывается только первый блок пагинации
+        self._pagination_depth = 0
+        self._pagination_seen = False
+        self._in_item = False
+        self._in_next = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "a":
+            attributes = dict(attrs)
+            if self._in_next:
+                self.has_next = True
+            if " ".join((attributes.get("class") or "").split()) == LINK_CLASS:
+                href = attributes.get("href")
+                if not href:
+                    logger.debug("Пропущена ссылка без href")
+                elif (link := bulletin_link(href)) is not None:
+                    self.links.append(link)
+        elif tag == "div":
+            if self._pagination_depth:
+                self._pagination_depth += 1
+            elif not self._pagination_seen and PAGINATION_CLASS in (dict(attrs).get("class") or "").split():
+                self._pagination_depth = 1
+                self._pagination_seen = True
+        elif tag == "li" and self._pagination_depth:
+            self._in_item = True
+            self._in_next = NEXT_PAGE_CLASS in (dict(attrs).get("class") or "").split()
+            self.page_items.append("")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "div" and self._pagination_depth:
+            self._pagination_depth -= 1
+        elif tag == "li":
+            self._in_item = False
+            self._in_next = False
+
+    def handle_data(self, data: str) -> None:
+        if self._in_item:
+            self.page_items[-1] += data
+
+    @property
+    def max_pages(self) -> int:
+        if len(self.page_items) < 2:
+            return 1
+        last_page = self.page_items[-2].strip()  # Предпоследний <li> перед "Вперед"
+        return int(last_page) if last_page.isdigit() else 1
+
+
+def parse_listing(html: str) -> Listing:
+    """Разбирает страницу списка бюллетеней."""
+    parser = ListingParser()
+    parser.feed(html)
+    parser.close()
+    logger.debug(f"Найдено {len(parser.links)} ссылок на странице")
+    return Listing(parser.links, parser.max_pages, parser.has_next)
+
+
+def parse_page_links(html: str) -> List[Tuple[str, date]]:
+    """Парсит все ссылки на бюллетени с одной страницы."""
+    return parse_listing(html).links
@@ -0,0 +1,101 @@
+import logging
+from typing import List
+
+from batches import RecordBatch
+from database import pooled_connection
+from models import SpimexTradingResult
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import Insert, insert
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = SpimexTradingResult.__tablename__
+STAGING_TABLE_NAME = f"{TABLE_NAME}_staging"
+COPY_COLUMNS = [
+    "instrument_id",
+    "oil_id",
+    "delivery_basis_id",
+    "delivery_type_id",
+    "volume",
+    "total",
+    "count",
+    "date",
+    "created_on",
+    "updated_on",
+]
+# Колонки, которые обновляются при повторной загрузке той же строки
+UPDATE_COLUMNS = ["volume", "total", "count"]
+
+_columns_sql = ", ".join(COPY_COLUMNS)
+_changed_sql = " OR ".join(f"t.{col} IS DISTINCT FROM excluded.{col}" for col in UPDATE_COLUMNS)
+_update_sql = ", ".join(f"{col} = excluded.{col}" for col in UPDATE_COLUMNS)
+
+NATURAL_KEY = "uq_spimex_trading_results_date_instrument"
+
+# ord — порядковый номер строки в батче: из повторов ключа сохраняется последняя строка, как в build_upsert
+STAGING_COLUMNS = [*COPY_COLUMNS, "ord"]
+CREATE_STAGING_SQL = (
+    f"CREATE TEMP TABLE {STAGING_TABLE_NAME} ON COMMIT DROP AS "
+    f"SELECT {_columns_sql}, 0 AS ord FROM {TABLE_NAME} WITH NO DATA"
+)
+# updated_on меняется только если значения действительно отличаются,
+# поэтому повторная загрузка того же бюллетеня ничего не переписывает
+MERGE_SQL = f"""
+INSERT INTO {TABLE_NAME} AS t ({_columns_sql})
+SELECT DISTINCT ON (date, instrument_id) {_columns_sql} FROM {STAGING_TABLE_NAME}
+ORDER BY date, instrument_id, ord DESC
+ON CONFLICT ON CONSTRAINT {NATURAL_KEY} DO UPDATE
+SET {_update_sql}, updated_on = excluded.updated_on
+WHERE {_changed_sql}
+"""
+
+
+def build_upsert(batch: List[dict]) -> Insert:
+    """Строит INSERT ... ON CONFLICT по естественному ключу (дата, инструмент).
+
+    Повторы ключа внутри батча схлопываются (остается последняя строка), как DISTINCT ON
+    по ord в MERGE_SQL: ON CONFLICT DO UPDATE не может обновить одну строку дважды.
+    """
+    batch = list({(row["date"], row["instrument_id"]): row for row in batch}.values())
+    stmt = insert(SpimexTradingResult).values(batch)
+    table = SpimexTradingResult.__table__
+    return stmt.on_conflict_do_update(
+        constraint=NATURAL_KEY,
+        set_={**{col: stmt.excluded[col] for col in UPDATE_COLUMNS}, "updated_on": stmt.excluded.updated_on},
+        where=or_(*(table.c[col].is_distinct_from(stmt.excluded[col]) for col in UPDATE_COLUMNS)),
+    )
+
+
+async def insert_batch(batch: RecordBatch, upsert: bool = False) -> None:
+    """Сохраняет батч одним INSERT ... VALUES через SQLAlchemy."""
+    rows = batch.to_records(COPY_COLUMNS)
+    stmt = build_upsert(rows) if upsert else insert(SpimexTradingResult).values(rows)
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(stmt)
+
+
+async def copy_batch(batch: RecordBatch, upsert: bool = False) -> None:
+    """Сохраняет батч через бинарный протокол COPY драйвера asyncpg.
+
+    При upsert строки сначала копируются во временную таблицу, а затем
+    сливаются с основной через ON CONFLICT по естественному ключу.
+    Строки собираются из колонок батча на лету, без промежуточных словарей.
+    """
+    async with pooled_connection() as conn:
+        raw_connection = await conn.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        async with driver_connection.transaction():
+            if not upsert:
+                await driver_connection.copy_records_to_table(
+                    TABLE_NAME, records=batch.rows(COPY_COLUMNS), columns=COPY_COLUMNS
+                )
+                return
+
+            await driver_connection.execute(CREATE_STAGING_SQL)
+            await driver_connection.copy_records_to_table(
+                STAGING_TABLE_NAME,
+                records=((*row, ord) for ord, row in enumerate(batch.rows(COPY_COLUMNS))),
+                columns=STAGING_COLUMNS,
+            )
+            status = await driver_connection.execute(MERGE_SQL)
+            logger.debug(f"Слияние батча: {status}")
@@ -0,0 +1,32 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+_config: Optional[Tuple[str, int]] = None
+
+
+def configure_logging(log_file: str, level: int = logging.INFO) -> None:
+    """Настраивает логирование через очередь: запись в файл и консоль идет в отдельном потоке."""
+    global _listener, _config
+    if _listener is not None:
+        return
+    _config = (log_file, level)
+
+    log_queue = queue.SimpleQueue()
+    # Сообщение форматируется QueueHandler, поэтому конечным обработчикам формат не нужен
+    _listener = QueueListener(
+        log_queue, logging.FileHandler(log_file, encoding="utf-8"), logging.StreamHandler(), respect_handler_level=True
+    )
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=[QueueHandler(log_queue)], force=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def logging_config() -> Optional[Tuple[str, int]]:
+    """Аргументы configure_logging текущего процесса — для настройки логирования в дочерних процессах."""
+    return _config
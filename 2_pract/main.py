@@ -1,7 +1,34 @@
+import argparse
 import asyncio
 from datetime import date
 
-from spimex_parser import process_bulletins
+from logging_setup import configure_logging
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Загрузка бюллетеней SPIMEX")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2023, 4, 22))
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 5, 11))
+    parser.add_argument("--output-dir", default="bulletins")
+    parser.add_argument("--no-resume", action="store_true", help="не пропускать бюллетени, загруженные по журналу")
+    parser.add_argument("--fill-gaps", action="store_true", help="загрузить только даты периода, которых нет в базе")
+    parser.add_argument("--daemon", action="store_true", help="опрашивать сайт и загружать новые бюллетени")
+    args = parser.parse_args()
+
+    configure_logging("spimex_parser.log")
+    if args.daemon:
+        from poller import run_poller
+
+        asyncio.run(run_poller(args.output_dir))
+    elif args.fill_gaps:
+        from planner import fill_gaps
+
+        asyncio.run(fill_gaps(args.start, args.end, args.output_dir))
+    else:
+        from spimex_parser import process_bulletins
+
+        asyncio.run(process_bulletins(args.start, args.end, args.output_dir, resume=not args.no_resume))
+
 
 if __name__ == "__main__":
-    asyncio.run(process_bulletins(date(2023, 4, 22), date(2025, 5, 11)))
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from database import pooled_connection
+from parse_cache import file_sha256
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DOWNLOADED = "downloaded"
+PARSED = "parsed"
+LOADED = "loaded"
+# Бюллетень не разобран или батч не записан; при повторном запуске обрабатывается заново
+FAILED = "failed"
+
+UPSERT_SQL = text(
+    """
+    INSERT INTO bulletin_manifest (trade_date, url, file_path, content_hash, byte_size, row_count, stage, error)
+    VALUES (:trade_date, :url, :file_path, :content_hash, :byte_size, :row_count, :stage, :error)
+    ON CONFLICT (trade_date) DO UPDATE
+    SET url = EXCLUDED.url, file_path = EXCLUDED.file_path, content_hash = EXCLUDED.content_hash,
+        byte_size = EXCLUDED.byte_size, row_count = EXCLUDED.row_count, stage = EXCLUDED.stage,
+        error = EXCLUDED.error, updated_on = now()
+    """
+)
+
+
+class ManifestEntry(NamedTuple):
+    trade_date: date
+    url: str
+    file_path: Optional[str] = None
+    content_hash: Optional[str] = None
+    byte_size: Optional[int] = None
+    row_count: Optional[int] = None
+    stage: str = DOWNLOADED
+    error: Optional[str] = None
+
+
+class IngestManifest:
+    """Журнал загрузки: до какой стадии дошел каждый бюллетень.
+
+    Бюллетень в стадии loaded при повторном запуске пропускается целиком, а уже
+    скачанный файл не загружается заново и идет сразу в парсинг. Ссылки на бюллетени
+    журнала берутся из него, поэтому список на сайте обходится только для остальных дат.
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[date, ManifestEntry] = {}
+        # Сколько батчей бюллетеня еще не записано; None — запись батча упала
+        self._pending: Dict[date, Optional[int]] = {}
+
+    async def load(self, start_date: date, end_date: date) -> None:
+        async with pooled_connection() as conn:
+            result = await conn.execute(
+                text(
+                    """
+                    SELECT trade_date, url, file_path, content_hash, byte_size, row_count, stage, error
+                    FROM bulletin_manifest WHERE trade_date BETWEEN :start_date AND :end_date
+                    """
+                ),
+                {"start_date": start_date, "end_date": end_date},
+            )
+            self.entries = {row.trade_date: ManifestEntry(*row) for row in result}
+        loaded = sum(entry.stage == LOADED for entry in self.entries.values())
+        logger.info(f"Журнал загрузки: {len(self.entries)} бюллетеней за период, из них загружено {loaded}")
+
+    def unfinished_links(self) -> List[Tuple[str, date]]:
+        """Ссылки на бюллетени журнала, не дошедшие до loaded, от новых к старым."""
+        return sorted(
+            ((entry.url, entry.trade_date) for entry in self.entries.values() if entry.stage != LOADED),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def is_loaded(self, trade_date: date) -> bool:
+        entry = self.entries.get(trade_date)
+        return entry is not None and entry.stage == LOADED
+
+    async def save(self, entry: ManifestEntry) -> None:
+        self.entries[entry.trade_date] = entry
+        async with pooled_connection() as conn, conn.begin():
+            await conn.execute(UPSERT_SQL, entry._asdict())
+
+    async def mark_downloaded(
+        self, url: str, trade_date: date, file_path: str, byte_size: Optional[int], content_hash: Optional[str] = None
+    ) -> None:
+        """Отмечает бюллетень скачанным; content_hash передается, если бюллетень уже в памяти."""
+        entry = self.entries.get(trade_date)
+        if content_hash is None and entry is not None and entry.file_path == file_path and entry.content_hash and not byte_size:
+            # Файл не перекачивался, хэш из журнала по-прежнему верен
+            content_hash = entry.content_hash
+            byte_size = entry.byte_size
+        elif content_hash is None:
+            content_hash = await asyncio.to_thread(file_sha256, file_path)
+            byte_size = byte_size or os.path.getsize(file_path)
+        await self.save(ManifestEntry(trade_date, url, file_path, content_hash, byte_size, None, DOWNLOADED))
+
+    async def mark_parsed(self, trade_date: date, row_count: int, batches: int) -> None:
+        entry = self.entries.get(trade_date)
+        if entry is None:
+            return
+        if not batches:
+            # Записывать нечего: бюллетень разобран без строк и сразу считается загруженным
+            await self.save(entry._replace(row_count=row_count, stage=LOADED, error=None))
+            return
+        self._pending[trade_date] = batches
+        await self.save(entry._replace(row_count=row_count, stage=PARSED, error=None))
+
+    async def mark_failed(self, trade_date: date, error: str) -> None:
+        """Отмечает бюллетень неудавшимся; он не считается загруженным и будет обработан повторно."""
+        entry = self.entries.get(trade_date)
+        if entry is None:
+            return
+        self._pending[trade_date] = None
+        await self.save(entry._replace(stage=FAILED, error=error[:1000]))
+
+    async def batch_saved(self, trade_date: date) -> None:
+        pending = self._pending.get(trade_date)
+        if pending is None:
+            return
+        self._pending[trade_date] = pending - 1
+        # Загруженным бюллетень становится, только когда записаны все его батчи
+        if pending - 1 == 0:
+            await self.save(self.entries[trade_date]._replace(stage=LOADED))
+
+    async def batch_failed(self, trade_date: date, error: str) -> None:
+        entry = self.entries.get(trade_date)
+        if entry is None or entry.stage == FAILED:
+            # Об упавшем бюллетене уже записано, остальные его батчи ничего не меняют
+            return
+        await self.mark_failed(trade_date, f"Ошибка записи батча: {error}")
@@ -0,0 +1,196 @@
+import functools
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, suppress
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    """Монотонный счетчик с необязательными метками."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labels, key)} {value}"
+
+    def summary(self) -> dict:
+        if not self.labels:
+            return {"total": self.total()}
+        return {",".join(key): value for key, value in sorted(self.values.items())}
+
+
+class Histogram:
+    """Гистограмма длительностей с кумулятивными бакетами, как в Prometheus."""
+
+    def __init__(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждой комбинации меток: счетчики бакетов, сумма, количество и максимум
+        self.series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+            series[3] = max(series[3], value)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (bucket_counts, total, count, _) in sorted(self.series.items()):
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                yield f"{self.name}_bucket{format_labels(self.labels + ('le',), key + (repr(bound),))} {bucket_count}"
+            yield f"{self.name}_bucket{format_labels(self.labels + ('le',), key + ('+Inf',))} {count}"
+            yield f"{self.name}_sum{format_labels(self.labels, key)} {total}"
+            yield f"{self.name}_count{format_labels(self.labels, key)} {count}"
+
+    def summary(self) -> dict:
+        return {
+            ",".join(key) or "all": {"count": count, "sum": total, "avg": total / count if count else 0.0, "max": peak}
+            for key, (_, total, count, peak) in sorted(self.series.items())
+        }
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+class MetricsRegistry:
+    """Набор метрик конвейера загрузки."""
+
+    def __init__(self) -> None:
+        self.pages_crawled = Counter("spimex_pages_crawled_total", "Загруженные страницы списка бюллетеней")
+        self.bulletins_downloaded = Counter("spimex_bulletins_downloaded_total", "Загруженные файлы бюллетеней")
+        self.bytes_downloaded = Counter("spimex_bytes_downloaded_total", "Загруженные байты бюллетеней")
+        self.rows_parsed = Counter("spimex_rows_parsed_total", "Строки, полученные парсингом")
+        self.rows_written = Counter("spimex_rows_written_total", "Строки, записанные в базу")
+        self.retries = Counter("spimex_retries_total", "Повторные попытки запросов", ["operation"])
+        self.throttled = Counter("spimex_throttled_total", "Ответы сайта 429/503", ["operation"])
+        self.circuit_opened = Counter("spimex_circuit_opened_total", "Срабатывания предохранителя запросов")
+        self.batch_failures = Counter("spimex_batch_failures_total", "Батчи, которые не удалось записать")
+        self.download_duration = Histogram("spimex_download_duration_seconds", "Длительность загрузки файла")
+        self.parse_duration = Histogram("spimex_parse_duration_seconds", "Длительность парсинга файла")
+        self.batch_write_duration = Histogram("spimex_batch_write_duration_seconds", "Длительность записи батча")
+        self.stage_duration = Histogram(
+            "spimex_stage_duration_seconds", "Длительность стадий конвейера", ["stage"], DEFAULT_BUCKETS + (300.0, 1800.0)
+        )
+
+    def reset(self) -> None:
+        """Обнуляет все метрики, чтобы сводка относилась только к текущему запуску."""
+        for metric in self.all():
+            with metric._lock:
+                if isinstance(metric, Counter):
+                    metric.values.clear()
+                else:
+                    metric.series.clear()
+
+    def all(self) -> list:
+        return [value for value in vars(self).values() if isinstance(value, (Counter, Histogram))]
+
+    def render_prometheus(self) -> str:
+        """Экспорт в текстовом формате Prometheus."""
+        return "\n".join(line for metric in self.all() for line in metric.render()) + "\n"
+
+    def run_summary(self) -> dict:
+        """Сводка запуска в JSON-совместимом виде."""
+        summary = {metric.name: metric.summary() for metric in self.all()}
+        write_seconds = self.stage_duration.series.get(("write",), [None, 0.0])[1]
+        summary["rows_written_per_second"] = self.rows_written.total() / write_seconds if write_seconds else 0.0
+        return summary
+
+    def export(self, prometheus_path: Optional[str], summary_path: Optional[str]) -> None:
+        """Атомарно записывает метрики в файлы (textfile collector и JSON-сводку)."""
+        if prometheus_path:
+            write_atomic(prometheus_path, self.render_prometheus())
+        if summary_path:
+            write_atomic(summary_path, json.dumps(self.run_summary(), ensure_ascii=False, indent=2))
+
+
+def write_atomic(path: str, content: str) -> None:
+    """Записывает файл через уникальный временный файл рядом, чтобы параллельные процессы не мешали друг другу."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        # mkstemp создает файл только для владельца, а файлы метрик читает сборщик
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Замеряет длительность стадии в spimex_stage_duration_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.stage_duration.observe(time.perf_counter() - started, stage=stage)
+
+
+def timed(stage: str):
+    """Декоратор: оборачивает синхронную или асинхронную функцию в span(stage)."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
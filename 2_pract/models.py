@@ -1,6 +1,20 @@
 from datetime import datetime
 
-from sqlalchemy import Date, DateTime, Float, Integer, String
+from sqlalchemy import (
+    CHAR,
+    BigInteger,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -8,19 +22,117 @@ class BaseModel(DeclarativeBase):
     pass
 
 
+class DeliveryBasis(BaseModel):
+    __tablename__ = "delivery_bases"
+    __table_args__ = (UniqueConstraint("name", name="uq_delivery_bases_name"),)
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    code: Mapped[str] = mapped_column(CHAR(3), nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+
+
+class Instrument(BaseModel):
+    __tablename__ = "instruments"
+    __table_args__ = (UniqueConstraint("exchange_product_id", name="uq_instruments_exchange_product_id"),)
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    exchange_product_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    exchange_product_name: Mapped[str] = mapped_column(String, nullable=False)
+    delivery_base_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("delivery_bases.id"), nullable=False)
+
+
 class SpimexTradingResult(BaseModel):
     __tablename__ = "spimex_trading_results"
+    # Таблица секционирована по месяцам (date), поэтому дата входит в первичный ключ
+    __table_args__ = (
+        UniqueConstraint("date", "instrument_id", name="uq_spimex_trading_results_date_instrument"),
+        Index("ix_spimex_trading_results_oil_basis_type_date", "oil_id", "delivery_basis_id", "delivery_type_id", "date"),
+        Index("ix_spimex_trading_results_basis_date", "delivery_basis_id", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    exchange_product_id: Mapped[str] = mapped_column(String, nullable=False)
-    exchange_product_name: Mapped[str] = mapped_column(String, nullable=False)
-    oil_id: Mapped[str] = mapped_column(String, nullable=False)
-    delivery_basis_id: Mapped[str] = mapped_column(String, nullable=False)
-    delivery_basis_name: Mapped[str] = mapped_column(String, nullable=False)
-    delivery_type_id: Mapped[str] = mapped_column(String, nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Названия инструмента и базиса поставки хранятся в справочниках
+    instrument_id: Mapped[int] = mapped_column(
+        SmallInteger, ForeignKey("instruments.id", name="fk_spimex_trading_results_instrument"), nullable=False
+    )
+    oil_id: Mapped[str] = mapped_column(CHAR(4), nullable=False)
+    delivery_basis_id: Mapped[str] = mapped_column(CHAR(3), nullable=False)
+    delivery_type_id: Mapped[str] = mapped_column(CHAR(1), nullable=False)
     volume: Mapped[float] = mapped_column(Float, nullable=False)
     total: Mapped[float] = mapped_column(Float, nullable=False)
     count: Mapped[int] = mapped_column(Integer, nullable=False)
-    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
     created_on: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     updated_on: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class DailyAggregate(BaseModel):
+    __tablename__ = "spimex_daily_aggregates"
+    __table_args__ = (
+        Index("ix_spimex_daily_aggregates_oil_basis_type_date", "oil_id", "delivery_basis_id", "delivery_type_id", "date"),
+    )
+
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    oil_id: Mapped[str] = mapped_column(CHAR(4), primary_key=True)
+    delivery_basis_id: Mapped[str] = mapped_column(CHAR(3), primary_key=True)
+    delivery_type_id: Mapped[str] = mapped_column(CHAR(1), primary_key=True)
+    volume: Mapped[float] = mapped_column(Float, nullable=False)
+    total: Mapped[float] = mapped_column(Float, nullable=False)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class MonthlyAggregate(BaseModel):
+    __tablename__ = "spimex_monthly_aggregates"
+    __table_args__ = (
+        Index(
+            "ix_spimex_monthly_aggregates_oil_basis_type_month", "oil_id", "delivery_basis_id", "delivery_type_id", "month"
+        ),
+    )
+
+    month: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    oil_id: Mapped[str] = mapped_column(CHAR(4), primary_key=True)
+    delivery_basis_id: Mapped[str] = mapped_column(CHAR(3), primary_key=True)
+    delivery_type_id: Mapped[str] = mapped_column(CHAR(1), primary_key=True)
+    volume: Mapped[float] = mapped_column(Float, nullable=False)
+    total: Mapped[float] = mapped_column(Float, nullable=False)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class BackfillShard(BaseModel):
+    __tablename__ = "backfill_shards"
+    __table_args__ = (
+        UniqueConstraint("start_date", "end_date", name="uq_backfill_shards_range"),
+        Index("ix_backfill_shards_status_start_date", "status", "start_date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    start_date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    # pending -> running -> done; после BACKFILL_MAX_ATTEMPTS неудач — failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default="pending")
+    worker_id: Mapped[str] = mapped_column(String, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    lease_expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_on: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_on: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class BulletinManifest(BaseModel):
+    __tablename__ = "bulletin_manifest"
+
+    trade_date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    url: Mapped[str] = mapped_column(String, nullable=False)
+    file_path: Mapped[str] = mapped_column(String, nullable=True)
+    content_hash: Mapped[str] = mapped_column(CHAR(64), nullable=True)
+    byte_size: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=True)
+    # downloaded -> parsed -> loaded; failed — не разобран или не записан, повторяется при следующем запуске
+    stage: Mapped[str] = mapped_column(String(16), nullable=False)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_on: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_on: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+from contextlib import suppress
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Считает SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Кэш результатов парсинга в Parquet, адресуемый хэшем содержимого файла, версией парсера и движком чтения.
+
+    Размер кэша ограничен max_bytes: при переполнении удаляются файлы, к которым
+    дольше всего не обращались (время обращения хранится в mtime).
+    """
+
+    def __init__(self, cache_dir: str, parser_version: int, max_bytes: int, reader: str = "") -> None:
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        self.reader = reader
+        self.max_bytes = max_bytes
+
+    def key(self, file_path: str, content: Optional[bytes] = None) -> str:
+        digest = file_sha256(file_path) if content is None else hashlib.sha256(content).hexdigest()
+        return f"{digest}-v{self.parser_version}-{self.reader}" if self.reader else f"{digest}-v{self.parser_version}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key: str) -> Optional[Dict[str, list]]:
+        """Читает колонки из кэша через memory map или возвращает None."""
+        # pyarrow загружается только при обращении к кэшу, а не при импорте модуля
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path(key)
+        try:
+            table = pq.read_table(path, memory_map=True)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Поврежденная запись кэша {path}, удаляем: {e}")
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        return table.to_pydict()
+
+    def put(self, key: str, columns: Dict[str, list]) -> None:
+        """Атомарно сохраняет колонки в кэш и освобождает место при переполнении."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.part"
+        try:
+            pq.write_table(pa.table(columns), tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Не удалось записать кэш {path}: {e}")
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Удаляет давно не использованные записи, пока кэш больше max_bytes."""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".parquet"):
+                    with suppress(FileNotFoundError):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(path)
+                logger.debug(f"Удалена запись кэша {path}")
+            total -= size
@@ -0,0 +1,70 @@
+import logging
+from datetime import date
+from typing import Iterator, Set
+
+from config import PARTITION_MONTHS_AHEAD
+from database import pooled_connection
+from models import SpimexTradingResult
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = SpimexTradingResult.__tablename__
+
+# Создание партиций сериализуется: параллельные CREATE TABLE IF NOT EXISTS ... PARTITION OF
+# из нескольких воркеров могут упасть на дублировании отношения в каталоге
+PARTITIONS_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext('spimex_partitions'))")
+
+# Месяцы, партиции которых созданы или проверены в этом процессе
+_ensured_months: Set[date] = set()
+
+
+class MissingPartitionError(RuntimeError):
+    """Для даты торгов нет месячной партиции: запись в таблицу упала бы без понятной причины."""
+
+
+def add_months(month_start: date, months: int) -> date:
+    """Сдвигает первое число месяца на указанное число месяцев."""
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def iter_months(start_date: date, end_date: date) -> Iterator[date]:
+    """Перебирает первые числа месяцев, покрывающих период."""
+    month = date(start_date.year, start_date.month, 1)
+    while month <= end_date:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month_start: date) -> str:
+    """Возвращает имя месячной партиции."""
+    return f"{TABLE_NAME}_y{month_start.year}m{month_start.month:02d}"
+
+
+async def ensure_partitions(start_date: date, end_date: date, months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    """Создает недостающие месячные партиции за период и на months_ahead месяцев вперед."""
+    latest = max(end_date, date.today())
+    last_date = add_months(date(latest.year, latest.month, 1), months_ahead)
+    months = list(iter_months(start_date, last_date))
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(PARTITIONS_LOCK_SQL)
+        for month in months:
+            await conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE_NAME} "
+                    f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                )
+            )
+    _ensured_months.update(months)
+    logger.info(f"Партиции {TABLE_NAME} готовы с {start_date} по {last_date}")
+
+
+def check_partition(trade_date: date) -> None:
+    """Проверяет, что партиция для trade_date создана через ensure_partitions в этом процессе."""
+    month = date(trade_date.year, trade_date.month, 1)
+    if month not in _ensured_months:
+        raise MissingPartitionError(
+            f"Нет партиции {partition_name(month)} для даты {trade_date}: "
+            f"период загрузки должен быть подготовлен через ensure_partitions"
+        )
@@ -0,0 +1,193 @@
+"""Догрузка пропусков: только даты, которых нет в базе, и только страницы списка с ними.
+
+Страницы списка отсортированы по убыванию даты, поэтому страница с нужной датой
+находится интерполяционным поиском по номеру страницы за несколько запросов.
+
+    python planner.py 2023-04-22 2025-05-11 --dry-run
+"""
+import argparse
+import asyncio
+import logging
+import math
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from database import pooled_connection
+from listing import Listing, parse_listing
+from logging_setup import configure_logging
+from sqlalchemy import text
+from spimex_parser import BASE_URL, create_http_session, fetch_page, get_page_url, process_bulletins
+
+logger = logging.getLogger(__name__)
+
+
+async def get_present_dates(start_date: date, end_date: date) -> set:
+    """Даты торгов за период, которые уже есть в spimex_trading_results."""
+    async with pooled_connection() as conn:
+        result = await conn.execute(
+            text("SELECT DISTINCT date FROM spimex_trading_results WHERE date BETWEEN :start_date AND :end_date"),
+            {"start_date": start_date, "end_date": end_date},
+        )
+        return set(result.scalars())
+
+
+def missing_trading_days(start_date: date, end_date: date, present: set) -> List[date]:
+    """Будние дни периода без данных, от новых к старым. Праздники отсеются при поиске по списку."""
+    days = ((end_date - start_date).days + 1) if end_date >= start_date else 0
+    candidates = (end_date - timedelta(days=i) for i in range(days))
+    return [day for day in candidates if day.weekday() < 5 and day not in present]
+
+
+class ListingIndex:
+    """Страницы списка бюллетеней, загружаемые по требованию и запоминаемые на время поиска."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self.session = session
+        self.pages: Dict[int, Listing] = {}
+        self.max_pages = 1
+
+    async def page(self, number: int) -> Listing:
+        if number not in self.pages:
+            html = await fetch_page(self.session, get_page_url(BASE_URL, number))
+            if html is None:
+                raise RuntimeError(f"Не удалось загрузить страницу списка {number}")
+            self.pages[number] = parse_listing(html)
+            if number == 1:
+                self.max_pages = self.pages[1].max_pages
+        return self.pages[number]
+
+    async def oldest_date(self, number: int) -> Optional[date]:
+        links = (await self.page(number)).links
+        return min(file_date for _, file_date in links) if links else None
+
+    def days_per_page(self) -> float:
+        """Сколько календарных дней в среднем покрывает страница, по первой странице."""
+        dates = [file_date for _, file_date in self.pages[1].links]
+        if len(dates) < 2:
+            return 1.0
+        return max((max(dates) - min(dates)).days * len(dates) / (len(dates) - 1), 1.0)
+
+    def estimate(self, target: date, lo: int, hi: int) -> int:
+        """Номер страницы для target в [lo, hi): интерполяция между загруженными страницами.
+
+        Правее последней известной страницы номер экстраполируется по средней плотности первой страницы.
+        """
+        anchors = {
+            number: min(file_date for _, file_date in listing.links)
+            for number, listing in self.pages.items()
+            if listing.links
+        }
+        before = [(number, oldest) for number, oldest in anchors.items() if number < lo]
+        after = [(number, oldest) for number, oldest in anchors.items() if number >= hi and oldest <= target]
+        guess = (lo + hi) // 2
+        if before:
+            n_before, d_before = max(before)
+            if after:
+                n_after, d_after = min(after)
+                if d_before > d_after:
+                    share = (d_before - target).days / (d_before - d_after).days
+                    guess = n_before + math.ceil(share * (n_after - n_before))
+            else:
+                guess = n_before + math.ceil((d_before - target).days / self.days_per_page())
+        return min(max(lo, guess), hi - 1)
+
+    async def find_page(self, target: date, lo: int = 1) -> int:
+        """Первая страница начиная с lo, на которой есть даты не новее target.
+
+        Если target старше всего списка, возвращается последняя страница.
+        """
+        await self.page(1)
+        oldest = await self.oldest_date(lo)
+        if oldest is None or oldest <= target:
+            return lo
+        lo, hi = lo + 1, self.max_pages
+        while lo < hi:
+            probe = self.estimate(target, lo, hi)
+            oldest = await self.oldest_date(probe)
+            if oldest is None or oldest <= target:
+                hi = probe
+            else:
+                lo = probe + 1
+        return min(lo, self.max_pages)
+
+
+async def locate_bulletins(session: aiohttp.ClientSession, missing: List[date]) -> List[Tuple[str, date]]:
+    """Находит ссылки на бюллетени за missing (от новых к старым), загружая только нужные страницы."""
+    index = ListingIndex(session)
+    wanted = set(missing)
+    found: Dict[date, str] = {}
+    lo = 1
+    for target in missing:
+        if target in found or target not in wanted:
+            continue
+        lo = await index.find_page(target, lo)
+        for url, file_date in (await index.page(lo)).links:
+            if file_date in wanted:
+                found[file_date] = url
+    logger.info(f"Найдено {len(found)} бюллетеней из {len(missing)} пропущенных дат, загружено страниц: {len(index.pages)}")
+    not_published = sorted(wanted - found.keys())
+    if not_published:
+        logger.info(f"Нет в списке бюллетеней (вероятно, нерабочие дни): {len(not_published)} дат")
+    return sorted(((url, file_date) for file_date, url in found.items()), key=lambda item: item[1], reverse=True)
+
+
+async def locate_range(session: aiohttp.ClientSession, start_date: date, end_date: date) -> List[Tuple[str, date]]:
+    """Ссылки на бюллетени за период: поиск страницы с end_date и проход по следующим до start_date."""
+    index = ListingIndex(session)
+    number = await index.find_page(end_date)
+    links = []
+    while True:
+        listing = await index.page(number)
+        links.extend((url, file_date) for url, file_date in listing.links if start_date <= file_date <= end_date)
+        oldest = min((file_date for _, file_date in listing.links), default=None)
+        if oldest is None or oldest <= start_date or number >= index.max_pages:
+            break
+        number += 1
+    logger.info(f"Бюллетеней за {start_date} — {end_date}: {len(links)}, загружено страниц: {len(index.pages)}")
+    return sorted(links, key=lambda item: item[1], reverse=True)
+
+
+async def plan_gaps(
+    start_date: date, end_date: date, session: Optional[aiohttp.ClientSession] = None
+) -> List[Tuple[str, date]]:
+    """Ссылки на бюллетени за даты периода, которых нет в базе."""
+    if session is None:
+        async with create_http_session() as own_session:
+            return await plan_gaps(start_date, end_date, own_session)
+
+    missing = missing_trading_days(start_date, end_date, await get_present_dates(start_date, end_date))
+    logger.info(f"Пропущенных будних дней за {start_date} — {end_date}: {len(missing)}")
+    if not missing:
+        return []
+    return await locate_bulletins(session, missing)
+
+
+async def fill_gaps(start_date: date, end_date: date, output_dir: str = "bulletins", dry_run: bool = False) -> int:
+    """Загружает только бюллетени за пропущенные даты периода. Возвращает число сохраненных записей."""
+    links = await plan_gaps(start_date, end_date)
+    if dry_run:
+        for url, file_date in links:
+            print(f"{file_date}  {url}")
+        return 0
+    if not links:
+        logger.info("Пропусков нет")
+        return 0
+    dates = [file_date for _, file_date in links]
+    return await process_bulletins(min(dates), max(dates), output_dir, links=links)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Догрузка пропущенных дат")
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("--output-dir", default="bulletins")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет загружено")
+    args = parser.parse_args()
+
+    configure_logging("spimex_parser.log")
+    asyncio.run(fill_gaps(args.start, args.end, args.output_dir, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
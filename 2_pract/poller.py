@@ -0,0 +1,174 @@
+"""Демон инкрементальной загрузки.
+
+Вместо полного обхода по расписанию опрашивает только первую страницу списка
+бюллетеней и загружает те, что новее последней загруженной даты. Состояние
+отдается по HTTP: GET /health.
+"""
+import asyncio
+import json
+import logging
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import aiohttp
+from aiohttp import web
+from config import (
+    POLL_FAST_INTERVAL,
+    POLL_HEALTH_HOST,
+    POLL_HEALTH_PORT,
+    POLL_INTERVAL,
+    POLL_JITTER,
+    POLL_MAX_BACKOFF,
+    POLL_TIMEZONE,
+    POLL_WINDOW_END,
+    POLL_WINDOW_START,
+)
+from database import pooled_connection
+from listing import parse_page_links
+from sqlalchemy import text
+from spimex_parser import BASE_URL, create_http_session, fetch_page, process_bulletins
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_TZ = ZoneInfo(POLL_TIMEZONE)
+
+
+class PollerState:
+    """Состояние демона, которое отдает эндпоинт здоровья."""
+
+    def __init__(self) -> None:
+        self.last_ingested_date: Optional[date] = None
+        self.started_at = datetime.now(EXCHANGE_TZ)
+        self.last_poll_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.next_poll_at: Optional[datetime] = None
+        self.polls = 0
+        self.bulletins_ingested = 0
+
+    def is_healthy(self) -> bool:
+        # Демон жив, пока хотя бы один опрос за последние два штатных интервала прошел успешно
+        reference = self.last_success_at or self.started_at
+        return datetime.now(EXCHANGE_TZ) - reference <= timedelta(seconds=2 * POLL_INTERVAL + POLL_MAX_BACKOFF)
+
+    def to_dict(self) -> dict:
+        return {
+            "status": "ok" if self.is_healthy() else "stale",
+            "last_ingested_date": self.last_ingested_date,
+            "started_at": self.started_at,
+            "last_poll_at": self.last_poll_at,
+            "last_success_at": self.last_success_at,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "next_poll_at": self.next_poll_at,
+            "polls": self.polls,
+            "bulletins_ingested": self.bulletins_ingested,
+        }
+
+
+async def get_last_ingested_date() -> Optional[date]:
+    async with pooled_connection() as conn:
+        return (await conn.execute(text("SELECT max(date) FROM spimex_trading_results"))).scalar()
+
+
+def in_publication_window(now: datetime) -> bool:
+    """Будний день в окне, когда биржа обычно публикует итоги торгов."""
+    window_start = time.fromisoformat(POLL_WINDOW_START)
+    window_end = time.fromisoformat(POLL_WINDOW_END)
+    return now.weekday() < 5 and window_start <= now.time() < window_end
+
+
+def next_delay(state: PollerState, now: datetime) -> float:
+    """Пауза до следующего опроса: экспоненциальная при ошибках, короткая в окне публикации."""
+    if state.consecutive_failures:
+        delay = min(POLL_FAST_INTERVAL * 2 ** state.consecutive_failures, POLL_MAX_BACKOFF)
+    elif in_publication_window(now) and state.last_ingested_date != now.date():
+        delay = POLL_FAST_INTERVAL
+    else:
+        delay = POLL_INTERVAL
+        # Не проспать начало окна публикации
+        window_start = datetime.combine(now.date(), time.fromisoformat(POLL_WINDOW_START), EXCHANGE_TZ)
+        if now < window_start:
+            delay = min(delay, (window_start - now).total_seconds())
+    # Джиттер разносит опросы нескольких экземпляров и не дает попадать в такт с сайтом
+    return max(delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER), 1.0)
+
+
+async def poll_once(session: aiohttp.ClientSession, state: PollerState, output_dir: str) -> None:
+    """Опрашивает первую страницу и загружает бюллетени новее последней загруженной даты."""
+    html = await fetch_page(session, BASE_URL)
+    if html is None:
+        raise RuntimeError(f"Не удалось загрузить {BASE_URL}")
+    links = parse_page_links(html)
+    last_date = state.last_ingested_date
+    new_links = [(url, file_date) for url, file_date in links if last_date is None or file_date > last_date]
+    if not new_links:
+        logger.debug(f"Новых бюллетеней нет, последняя дата {last_date}")
+        return
+
+    start_date = min(file_date for _, file_date in new_links)
+    end_date = max(file_date for _, file_date in new_links)
+    if last_date is not None and len(new_links) == len(links):
+        # Вся первая страница новее последней даты: пропуск длиннее страницы, догружаем обходом
+        start_date = last_date + timedelta(days=1)
+        logger.info(f"Пропуск с {start_date} не помещается на первую страницу, запускаем обход")
+        await process_bulletins(start_date, end_date, output_dir)
+    else:
+        logger.info(f"Новых бюллетеней: {len(new_links)} ({start_date} — {end_date})")
+        await process_bulletins(start_date, end_date, output_dir, links=new_links)
+
+    state.last_ingested_date = await get_last_ingested_date()
+    state.bulletins_ingested += len(new_links)
+
+
+async def start_health_server(state: PollerState, host: str, port: int) -> web.AppRunner:
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response(
+            state.to_dict(),
+            status=200 if state.is_healthy() else 503,
+            dumps=lambda data: json.dumps(data, default=str),
+        )
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Эндпоинт здоровья: http://{host}:{port}/health")
+    return runner
+
+
+async def run_poller(
+    output_dir: str = "bulletins", health_host: str = POLL_HEALTH_HOST, health_port: int = POLL_HEALTH_PORT
+) -> None:
+    """Опрашивает сайт до остановки процесса."""
+    state = PollerState()
+    state.last_ingested_date = await get_last_ingested_date()
+    logger.info(f"Демон запущен, последняя загруженная дата: {state.last_ingested_date}")
+
+    runner = await start_health_server(state, health_host, health_port)
+    try:
+        async with create_http_session() as session:
+            while True:
+                state.polls += 1
+                state.last_poll_at = datetime.now(EXCHANGE_TZ)
+                try:
+                    await poll_once(session, state, output_dir)
+                except Exception as e:
+                    state.consecutive_failures += 1
+                    state.last_error = str(e)
+                    logger.error(f"Опрос завершился ошибкой ({state.consecutive_failures} подряд): {e}")
+                else:
+                    state.consecutive_failures = 0
+                    state.last_success_at = datetime.now(EXCHANGE_TZ)
+
+                now = datetime.now(EXCHANGE_TZ)
+                delay = next_delay(state, now)
+                state.next_poll_at = now + timedelta(seconds=delay)
+                logger.debug(f"Следующий опрос через {delay:.0f} с")
+                await asyncio.sleep(delay)
+    finally:
+        await runner.cleanup()
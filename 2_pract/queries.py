@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+import asyncpg
+from config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from database import POSTGRES_DSN, pooled_connection
+from models import DailyAggregate, DeliveryBasis, Instrument, SpimexTradingResult
+from sqlalchemy import Float, Select, func, select, text
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres, в который загрузка сообщает о завершении запуска
+INGEST_CHANNEL = "spimex_ingest"
+
+
+class AsyncTTLCache:
+    """LRU-кэш результатов корутин с TTL; одинаковые одновременные промахи выполняют запрос один раз.
+
+    Закэшированные значения общие для всех вызывающих, изменять их нельзя.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._pending: dict = {}
+        self._generation = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(key, loader))
+            self._pending[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation
+        try:
+            value = await loader()
+        finally:
+            self._pending.pop(key, None)
+        # Результат запроса, начатого до инвалидации, не кэшируем: он может быть устаревшим
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+
+query_cache = AsyncTTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+
+def results_query() -> Select:
+    """Строки результатов торгов с названиями инструмента и базиса из справочников."""
+    return (
+        select(
+            SpimexTradingResult.date,
+            Instrument.exchange_product_id,
+            Instrument.exchange_product_name,
+            SpimexTradingResult.oil_id,
+            SpimexTradingResult.delivery_basis_id,
+            DeliveryBasis.name.label("delivery_basis_name"),
+            SpimexTradingResult.delivery_type_id,
+            SpimexTradingResult.volume,
+            SpimexTradingResult.total,
+            SpimexTradingResult.count,
+        )
+        .join(Instrument, Instrument.id == SpimexTradingResult.instrument_id)
+        .join(DeliveryBasis, DeliveryBasis.id == Instrument.delivery_base_id)
+    )
+
+
+def apply_filters(
+    stmt: Select,
+    oil_id: Optional[str] = None,
+    delivery_type_id: Optional[str] = None,
+    delivery_basis_id: Optional[str] = None,
+    model: type = SpimexTradingResult,
+) -> Select:
+    """Фильтры по коду топлива, типу и базису поставки; model — таблица с этими колонками."""
+    if oil_id:
+        stmt = stmt.where(model.oil_id == oil_id)
+    if delivery_type_id:
+        stmt = stmt.where(model.delivery_type_id == delivery_type_id)
+    if delivery_basis_id:
+        stmt = stmt.where(model.delivery_basis_id == delivery_basis_id)
+    return stmt
+
+
+def dynamics_query() -> Select:
+    """Динамика по дням из дневных сводок: суммарные объем, сумма и число договоров и средневзвешенная цена."""
+    volume = func.sum(DailyAggregate.volume)
+    total = func.sum(DailyAggregate.total)
+    return select(
+        DailyAggregate.date,
+        volume.label("volume"),
+        total.label("total"),
+        func.sum(DailyAggregate.count).label("count"),
+        (total / func.nullif(volume, 0, type_=Float)).label("weighted_price"),
+    ).group_by(DailyAggregate.date)
+
+
+async def fetch_all(stmt: Select) -> List[dict]:
+    async with pooled_connection() as conn:
+        result = await conn.execute(stmt)
+        return [dict(row._mapping) for row in result]
+
+
+async def get_last_trading_dates(limit: int = 10) -> List[date]:
+    """Последние limit дат торгов."""
+
+    async def load() -> List[date]:
+        stmt = select(SpimexTradingResult.date).distinct().order_by(SpimexTradingResult.date.desc()).limit(limit)
+        async with pooled_connection() as conn:
+            return list((await conn.execute(stmt)).scalars())
+
+    return await query_cache.get_or_load(("last_trading_dates", limit), load)
+
+
+async def get_dynamics(
+    start_date: date,
+    end_date: date,
+    oil_id: Optional[str] = None,
+    delivery_type_id: Optional[str] = None,
+    delivery_basis_id: Optional[str] = None,
+) -> List[dict]:
+    """Динамика торгов по дням за период: объем, сумма, число договоров и средневзвешенная цена.
+
+    Строки подходящих под фильтры инструментов суммируются по дате; цена — сумма договоров,
+    деленная на объем (None, если объема за день нет).
+    """
+
+    async def load() -> List[dict]:
+        stmt = dynamics_query().where(DailyAggregate.date.between(start_date, end_date))
+        stmt = apply_filters(stmt, oil_id, delivery_type_id, delivery_basis_id, DailyAggregate)
+        return await fetch_all(stmt.order_by(DailyAggregate.date))
+
+    key = ("dynamics", start_date, end_date, oil_id, delivery_type_id, delivery_basis_id)
+    return await query_cache.get_or_load(key, load)
+
+
+async def get_trading_results(
+    oil_id: Optional[str] = None,
+    delivery_type_id: Optional[str] = None,
+    delivery_basis_id: Optional[str] = None,
+) -> List[dict]:
+    """Результаты последних торгов, в которых есть подходящие под фильтры инструменты."""
+
+    async def load() -> List[dict]:
+        last_date = apply_filters(
+            select(func.max(SpimexTradingResult.date)), oil_id, delivery_type_id, delivery_basis_id
+        ).scalar_subquery()
+        stmt = apply_filters(results_query(), oil_id, delivery_type_id, delivery_basis_id)
+        return await fetch_all(
+            stmt.where(SpimexTradingResult.date == last_date).order_by(Instrument.exchange_product_id)
+        )
+
+    return await query_cache.get_or_load(("trading_results", oil_id, delivery_type_id, delivery_basis_id), load)
+
+
+def invalidate_query_cache() -> None:
+    """Сбрасывает кэш запросов текущего процесса."""
+    query_cache.invalidate()
+    logger.info("Кэш запросов к результатам торгов сброшен")
+
+
+async def publish_ingest_finished(last_date: date) -> None:
+    """Сообщает о завершении загрузки: сбрасывает локальный кэш и уведомляет другие процессы через NOTIFY."""
+    invalidate_query_cache()
+    async with pooled_connection() as conn, conn.begin():
+        await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INGEST_CHANNEL, "payload": str(last_date)})
+
+
+async def listen_for_ingest() -> asyncpg.Connection:
+    """Подписывает процесс на уведомления о загрузке и сбрасывает кэш при каждом из них.
+
+    Возвращает выделенное соединение слушателя; его нужно закрыть при остановке сервиса.
+    """
+    connection = await asyncpg.connect(POSTGRES_DSN)
+
+    def on_notify(conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        logger.info(f"Получено уведомление о загрузке за {payload}")
+        invalidate_query_cache()
+
+    await connection.add_listener(INGEST_CHANNEL, on_notify)
+    return connection
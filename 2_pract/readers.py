@@ -0,0 +1,152 @@
+import io
+import logging
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Строка с заголовками и первая строка данных в листе бюллетеня (с нуля)
+HEADER_ROW = 6
+DATA_START_ROW = 8
+
+# Путь к файлу бюллетеня или его содержимое, уже загруженное в память
+BulletinSource = Union[str, bytes]
+
+
+class BulletinFormatError(ValueError):
+    """Лист бюллетеня не соответствует ожидаемой разметке."""
+
+
+def clean_header(value) -> str:
+    return str(value if value is not None else "").replace("\n", " ").strip()
+
+
+def is_block_end(code) -> bool:
+    """Пустая ячейка кода, повторный заголовок или строка итогов завершают блок данных."""
+    if code is None or (isinstance(code, float) and pd.isna(code)):
+        return True
+    code = str(code).strip()
+    return not code or code.startswith("Код") or code.startswith("Итог")
+
+
+def locate_columns(header_row: Sequence, columns: Sequence[str]) -> List[int]:
+    """Возвращает индексы нужных столбцов по строке заголовков (в координатах этой строки, с нуля)."""
+    headers = [clean_header(value) for value in header_row]
+    positions = {}
+    for index, header in enumerate(headers):
+        if header:
+            positions.setdefault(header, index)
+    missing = [col for col in columns if col not in positions]
+    if missing:
+        raise BulletinFormatError(f"Отсутствуют столбцы: {missing}")
+    return [positions[col] for col in columns]
+
+
+def collect_block(rows: Iterable[Sequence], indexes: List[int], columns: Sequence[str]) -> pd.DataFrame:
+    """Собирает только нужные столбцы строк данных до конца блока.
+
+    Пустые ячейки xlrd и calamine отдают как "", а pandas — как пропуск: здесь они приводятся
+    к None, чтобы пустые значения не проходили проверку схемы как строки.
+    """
+    values: Dict[str, list] = {col: [] for col in columns}
+    key_index = indexes[0]
+    for row in rows:
+        if key_index >= len(row) or is_block_end(row[key_index]):
+            break
+        for col, index in zip(columns, indexes):
+            value = row[index] if index < len(row) else None
+            values[col].append(None if value == "" else value)
+    return pd.DataFrame(values, dtype=object)
+
+
+def read_calamine(source: BulletinSource, columns: Sequence[str]) -> pd.DataFrame:
+    """Чтение через python-calamine (Rust): отбираются только нужные столбцы до конца блока."""
+    from python_calamine import CalamineWorkbook
+
+    if isinstance(source, bytes):
+        workbook = CalamineWorkbook.from_filelike(io.BytesIO(source))
+    else:
+        workbook = CalamineWorkbook.from_path(source)
+    sheet = workbook.get_sheet_by_index(0)
+    # iter_rows читает лист лениво: строки до sheet.start он дополняет пустыми, поэтому номера
+    # строк абсолютные, а столбцы начинаются с sheet.start (пустой столбец A отбрасывается).
+    # Заголовки и данные берутся из одних и тех же строк, так что индексы столбцов совпадают
+    rows = sheet.iter_rows()
+    header_row = next(islice(rows, HEADER_ROW, None), None)
+    if header_row is None:
+        raise BulletinFormatError("Файл слишком короткий, нет строки с заголовками")
+    indexes = locate_columns(header_row, columns)
+    return collect_block(islice(rows, DATA_START_ROW - HEADER_ROW - 1, None), indexes, columns)
+
+
+def read_xlrd(source: BulletinSource, columns: Sequence[str]) -> pd.DataFrame:
+    """Прямое чтение через xlrd: читаются только ячейки нужных столбцов до конца блока."""
+    import xlrd
+
+    if isinstance(source, bytes):
+        book = xlrd.open_workbook(file_contents=source, on_demand=True)
+    else:
+        book = xlrd.open_workbook(source, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        if sheet.nrows <= HEADER_ROW:
+            raise BulletinFormatError("Файл слишком короткий, нет строки с заголовками")
+        indexes = locate_columns(sheet.row_values(HEADER_ROW), columns)
+        rows = (
+            [sheet.cell_value(r, i) if i < sheet.row_len(r) else None for i in indexes]
+            for r in range(DATA_START_ROW, sheet.nrows)
+        )
+        return collect_block(rows, list(range(len(indexes))), columns)
+    finally:
+        book.release_resources()
+
+
+def read_pandas(source: BulletinSource, columns: Sequence[str]) -> pd.DataFrame:
+    """Исходный способ: весь лист через pd.read_excel, затем отбор столбцов и строк."""
+    df = pd.read_excel(io.BytesIO(source) if isinstance(source, bytes) else source, sheet_name=0, header=None)
+    if len(df) <= HEADER_ROW:
+        raise BulletinFormatError("Файл слишком короткий, нет строки с заголовками")
+    indexes = locate_columns(df.iloc[HEADER_ROW].tolist(), columns)
+    data_df = df.iloc[DATA_START_ROW:, indexes]
+    data_df.columns = list(columns)
+
+    # Та же граница блока, что у остальных движков: пустой код, повторный заголовок или итоги
+    block_end = data_df[columns[0]].map(is_block_end).to_numpy(dtype=bool)
+    if block_end.any():
+        data_df = data_df.iloc[: int(block_end.argmax())]
+    return data_df.reset_index(drop=True)
+
+
+READERS: Dict[str, Callable[[BulletinSource, Sequence[str]], pd.DataFrame]] = {
+    "calamine": read_calamine,
+    "xlrd": read_xlrd,
+    "pandas": read_pandas,
+}
+
+
+def read_bulletin_table(
+    file_path: str, columns: Sequence[str], engine: str = "pandas", content: Optional[bytes] = None
+) -> pd.DataFrame:
+    """Читает блок данных бюллетеня: только столбцы columns, до первой пустой строки или итогов.
+
+    Если передано content, бюллетень читается из памяти, а file_path служит только для логов.
+    Если быстрый движок недоступен или не справился с файлом, используется pandas.
+    Ошибки разметки (BulletinFormatError) пробрасываются вызывающему.
+    """
+    reader = READERS.get(engine)
+    if reader is None:
+        raise ValueError(f"Неизвестный движок чтения xls: {engine}")
+    source = file_path if content is None else content
+    if reader is read_pandas:
+        return read_pandas(source, columns)
+    try:
+        return reader(source, columns)
+    except BulletinFormatError:
+        raise
+    except ImportError as e:
+        logger.warning(f"Движок {engine} недоступен ({e}), читаем {file_path} через pandas")
+    except Exception as e:
+        logger.warning(f"Движок {engine} не смог прочитать {file_path} ({e}), читаем через pandas")
+    return read_pandas(source, columns)
@@ -1,282 +1,615 @@
 import asyncio
+import hashlib
 import logging
+import multiprocessing
 import os
-import ssl
-import urllib.request
-from datetime import date, datetime
-from typing import List, Optional, Tuple
-
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from database import async_engine
-from models import SpimexTradingResult
-from pydantic import BaseModel, Field, computed_field
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("spimex_parser.log", encoding="utf-8"), logging.StreamHandler()],
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from datetime import date
+from typing import Any, Awaitable, BinaryIO, Callable, List, NamedTuple, Optional, Set, Tuple
+
+import aiohttp
+from aggregates import refresh_aggregates
+from archive import ARCHIVE_DONE, BulletinArchive, archive_bulletins
+from batches import RecordBatch
+from config import (
+    ARCHIVE_DIR,
+    BATCH_SIZE,
+    BULLETIN_STORAGE,
+    CRAWL_CONCURRENCY,
+    DOWNLOAD_CONCURRENCY,
+    HTTP_POOL_SIZE,
+    INGEST_RESUME,
+    METRICS_PROM_FILE,
+    METRICS_SUMMARY_FILE,
+    PARALLEL_PARSE,
+    PARSE_CACHE_ENABLED,
+    PARSE_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    SPIMEX_URL,
+    WRITE_CONCURRENCY,
+    WRITE_METHOD,
+    WRITE_UPSERT,
 )
+from database import log_pool_metrics, pool_capacity
+from dimensions import dimension_cache
+from governor import governor
+from listing import parse_listing, parse_page_links
+from loader import copy_batch, insert_batch
+from logging_setup import configure_logging, logging_config
+from manifest import IngestManifest
+from metrics import metrics, span, timed
+from partitions import check_partition, ensure_partitions
+from queries import publish_ingest_finished
+
 logger = logging.getLogger(__name__)
 
-ssl._create_default_https_context = ssl._create_unverified_context
+BASE_URL = f"{SPIMEX_URL}/markets/oil_products/trades/results/"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+}
 
 
-class TradingResultModel(BaseModel):
-    exchange_product_id: str = Field(..., alias="Код Инструмента")
-    exchange_product_name: str = Field(..., alias="Наименование Инструмента")
-    delivery_basis_name: str = Field(..., alias="Базис поставки")
-    volume: float = Field(..., alias="Объем Договоров в единицах измерения")
-    total: float = Field(..., alias="Обьем Договоров, руб.")
-    count: int = Field(..., alias="Количество Договоров, шт.")
-    date: date
-    created_on: datetime
-    updated_on: datetime
+STAGE_DONE = object()
 
-    @computed_field
-    @property
-    def oil_id(self) -> str:
-        return self.exchange_product_id[:4]
 
-    @computed_field
-    @property
-    def delivery_basis_id(self) -> str:
-        return self.exchange_product_id[4:7]
+async def run_stage(
+    workers: int,
+    in_queue: asyncio.Queue,
+    out_queue: Optional[asyncio.Queue],
+    handle: Callable[[Any], Awaitable[None]],
+) -> None:
+    """Запускает workers обработчиков стадии конвейера и сообщает следующей стадии о завершении."""
 
-    @computed_field
-    @property
-    def delivery_type_id(self) -> str:
-        return self.exchange_product_id[-1]
+    async def worker() -> None:
+        while (item := await in_queue.get()) is not STAGE_DONE:
+            await handle(item)
+        # Возвращаем маркер, чтобы его увидели остальные обработчики стадии
+        await in_queue.put(STAGE_DONE)
 
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if out_queue is not None:
+        await out_queue.put(STAGE_DONE)
 
-async def get_max_pages(base_url: str, headers: dict) -> int:
-    """Получает максимальное количество страниц пагинации."""
-    try:
-        response = requests.get(base_url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        pagination = soup.find("div", class_="bx-pagination-container")
-        if not pagination:
-            return 1
-        pages = pagination.find_all("li")
-        if not pages:
-            return 1
-        last_page = pages[-2].text.strip()  # Предпоследний <li> перед "Вперед"
-        return int(last_page) if last_page.isdigit() else 1
-    except Exception as e:
-        logger.error(f"Ошибка при определении количества страниц: {e}")
-        return 1
 
+def create_http_session(pool_size: int = HTTP_POOL_SIZE) -> aiohttp.ClientSession:
+    """Создает общий HTTP-клиент с пулом keep-alive соединений."""
+    # Проверка сертификата сайта отключена, как и раньше
+    connector = aiohttp.TCPConnector(limit=pool_size, ssl=False, keepalive_timeout=30)
+    return aiohttp.ClientSession(
+        connector=connector, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=60)
+    )
 
-async def fetch_page(page_url: str, headers: dict, retries: int = 3, delay: float = 2.0) -> Optional[str]:
-    """Загружает страницу с ретраями."""
-    for attempt in range(retries):
-        try:
-            response = requests.get(page_url, headers=headers)
+
+def get_page_url(base_url: str, page: int) -> str:
+    """Возвращает URL страницы пагинации."""
+    return f"{base_url}?page=page-{page}" if page > 1 else base_url
+
+
+async def fetch_page(session: aiohttp.ClientSession, page_url: str, retries: Optional[int] = None) -> Optional[str]:
+    """Загружает страницу через общий регулятор запросов с повторами."""
+
+    async def request(headers_received: Callable[[], None]) -> str:
+        async with session.get(page_url) as response:
+            headers_received()
             response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
-            logger.warning(f"Попытка {attempt + 1} не удалась для {page_url}: {e}")
-            if attempt < retries - 1:
-                await asyncio.sleep(delay)
-    logger.error(f"Не удалось загрузить страницу {page_url} после {retries} попыток")
-    return None
+            return await response.text()
 
+    try:
+        html = await governor.run("page", page_url, request, retries)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Не удалось загрузить страницу {page_url}: {e}")
+        return None
+    metrics.pages_crawled.inc()
+    return html
+
+
+@timed("crawl")
+async def crawl_bulletin_urls(
+    session: aiohttp.ClientSession,
+    start_date: date,
+    end_date: date,
+    on_links: Callable[[List[Tuple[str, date]]], Awaitable[None]],
+    concurrency: int = CRAWL_CONCURRENCY,
+) -> None:
+    """Обходит страницы пагинации параллельно и передает бюллетени из диапазона в on_links.
+
+    on_links вызывается по мере загрузки страниц, поэтому порядок страниц не гарантирован.
+    """
+    first_html = await fetch_page(session, BASE_URL)
+    if not first_html:
+        return
 
-async def parse_page_links(
-    soup: BeautifulSoup, start_date: date, end_date: date, base_url: str
-) -> List[Tuple[str, date]]:
-    """Парсит ссылки на бюллетени с одной страницы."""
-    bulletin_urls = []
-    links = soup.find_all("a", class_="accordeon-inner__item-title link xls")
-    logger.info(f"Найдено {len(links)} ссылок на странице")
+    first_listing = parse_listing(first_html)
+    max_pages = first_listing.max_pages
+    logger.info(f"Найдено {max_pages} страниц пагинации")
 
-    for link in links:
-        href = link.get("href")
-        if not href:
-            logger.debug("Пропущена ссылка без href")
-            continue
+    # Страницы отсортированы по убыванию даты: как только на странице встречается
+    # дата раньше start_date, следующие страницы уже не нужны
+    stop = asyncio.Event()
 
-        href = href.split("?")[0]
-        if "/upload/reports/oil_xls/oil_xls_" not in href or not href.endswith(".xls"):
-            logger.debug(f"Пропущена ссылка {href}: не соответствует шаблону oil_xls_")
-            continue
+    async def handle_links(page: int, links: List[Tuple[str, date]]) -> None:
+        in_range = [(url, file_date) for url, file_date in links if start_date <= file_date <= end_date]
+        if in_range:
+            await on_links(in_range)
+        if any(file_date < start_date for _, file_date in links):
+            logger.info(f"Страница {page} содержит данные раньше {start_date}, завершаем сбор")
+            stop.set()
 
-        try:
-            file_date_str = href.split("oil_xls_")[1][:8]
-            file_date = datetime.strptime(file_date_str, "%Y%m%d").date()
-            if start_date <= file_date <= end_date:
-                full_url = href if href.startswith("http") else f"https://spimex.com{href}"
-                bulletin_urls.append((full_url, file_date))
-                logger.debug(f"Добавлена ссылка: {full_url}, дата: {file_date}")
-            else:
-                logger.debug(f"Ссылка {href} вне диапазона дат")
-        except (IndexError, ValueError) as e:
-            logger.warning(f"Не удалось извлечь дату из ссылки {href}: {e}")
+    await handle_links(1, first_listing.links)
 
-    return bulletin_urls
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def crawl_page(page: int) -> None:
+        try:
+            page_url = get_page_url(BASE_URL, page)
+            logger.debug(f"Обрабатывается страница {page}: {page_url}")
+            html = await fetch_page(session, page_url)
+            if html:
+                await handle_links(page, parse_page_links(html))
+        finally:
+            semaphore.release()
+
+    tasks = []
+    for page in range(2, max_pages + 1):
+        await semaphore.acquire()
+        if stop.is_set():
+            semaphore.release()
+            break
+        tasks.append(asyncio.create_task(crawl_page(page)))
+    await asyncio.gather(*tasks)
 
 
-async def get_bulletin_urls(start_date: date, end_date: date) -> List[Tuple[str, date]]:
+async def get_bulletin_urls(
+    start_date: date,
+    end_date: date,
+    session: Optional[aiohttp.ClientSession] = None,
+    concurrency: int = CRAWL_CONCURRENCY,
+) -> List[Tuple[str, date]]:
     """Собирает URL бюллетеней за указанный период с учетом пагинации."""
-    base_url = "https://spimex.com/markets/oil_products/trades/results/"
-    bulletin_urls = []
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-    }
+    if session is None:
+        async with create_http_session() as own_session:
+            return await get_bulletin_urls(start_date, end_date, own_session, concurrency)
 
-    max_pages = await get_max_pages(base_url, headers)
-    logger.info(f"Найдено {max_pages} страниц пагинации")
+    bulletin_urls = []
 
-    for page in range(1, max_pages + 1):
-        page_url = f"{base_url}?page=page-{page}" if page > 1 else base_url
-        logger.info(f"Обрабатывается страница {page}: {page_url}")
-
-        html = await fetch_page(page_url, headers)
-        if not html:
-            continue
-
-        soup = BeautifulSoup(html, "html.parser")
-        page_urls = await parse_page_links(soup, start_date, end_date, base_url)
-        bulletin_urls.extend(page_urls)
-
-        # Проверяем, нужно ли продолжать
-        if page_urls:
-            earliest_date = min(date for _, date in page_urls)
-            if earliest_date < date(2023, 1, 1):
-                logger.info("Достигнута страница с данными до 2023 года, завершаем сбор")
-                break
-
-        # Проверяем наличие следующей страницы
-        pagination = soup.find("div", class_="bx-pagination-container")
-        if pagination:
-            next_page = pagination.find("li", class_="bx-pag-next")
-            if not next_page or not next_page.find("a"):
-                logger.info("Достигнута последняя страница пагинации")
-                break
+    async def collect(links: List[Tuple[str, date]]) -> None:
+        bulletin_urls.extend(links)
 
+    await crawl_bulletin_urls(session, start_date, end_date, collect, concurrency)
+    bulletin_urls.sort(key=lambda item: item[1], reverse=True)
     logger.info(f"Всего найдено {len(bulletin_urls)} подходящих бюллетеней")
     return bulletin_urls
 
 
-def download_bulletin(url: str, output_path: str) -> bool:
-    """Загружает бюллетень по указанному URL."""
-    try:
-        if os.path.exists(output_path):
-            logger.info(f"Файл {output_path} уже существует, пропускаем загрузку")
-            return True
-        urllib.request.urlretrieve(url, output_path)
-        logger.info(f"Бюллетень загружен: {output_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Ошибка при загрузке бюллетеня {url}: {e}")
-        return False
+def rewind_file(file: BinaryIO) -> None:
+    file.seek(0)
+    file.truncate()
 
 
-def parse_bulletin(file_path: str, trade_date: date) -> List[dict]:
-    """Парсит Excel-бюллетень и возвращает список словарей."""
-    try:
-        df = pd.read_excel(file_path, sheet_name=0, header=None)
-
-        if len(df) <= 6:
-            logger.error(f"Файл {file_path} слишком короткий, нет строки с заголовками")
-            return []
-
-        headers = df.iloc[6].fillna("").tolist()
-        headers_clean = [h.replace("\n", " ").strip() for h in headers[1:]]
-
-        required_columns = {
-            "Код Инструмента": "exchange_product_id",
-            "Наименование Инструмента": "exchange_product_name",
-            "Базис поставки": "delivery_basis_name",
-            "Объем Договоров в единицах измерения": "volume",
-            "Обьем Договоров, руб.": "total",
-            "Количество Договоров, шт.": "count",
-        }
-
-        missing_cols = [col for col in required_columns if col not in headers_clean]
-        if missing_cols:
-            logger.error(f"Отсутствуют столбцы в {file_path}: {missing_cols}")
-            return []
-
-        data_rows = []
-        for i in range(8, len(df)):
-            row = df.iloc[i].tolist()
-            if pd.isna(row[1]) or row[1] == "" or row[1] == "Код Инструмента" or row[1].startswith("Код"):
-                logger.debug(f"Пропущена строка {i + 1}: содержит пустое значение или заголовок")
-                break
-            data_rows.append(row[1:])
-
-        if not data_rows:
-            logger.warning(f"Нет данных в {file_path} после строки с заголовками")
-            return []
-
-        data_df = pd.DataFrame(data_rows, columns=headers_clean)
-
-        for col in ["Объем Договоров в единицах измерения", "Обьем Договоров, руб.", "Количество Договоров, шт."]:
-            data_df[col] = data_df[col].replace("-", pd.NA)
-            data_df[col] = pd.to_numeric(data_df[col], errors="coerce").fillna(0)
-
-        data_df = data_df[data_df["Количество Договоров, шт."] > 0]
-        data_df = data_df[list(required_columns.keys())]
-        data_df = data_df[~data_df["Код Инструмента"].str.contains("Итог", case=False, na=False)]
-
-        current_time = pd.to_datetime(datetime.now())
-        data_df["date"] = trade_date
-        data_df["created_on"] = current_time
-        data_df["updated_on"] = current_time
-
-        from pydantic import TypeAdapter
-
-        adapter = TypeAdapter(List[TradingResultModel])
-        records = adapter.validate_python(data_df.to_dict(orient="records"))
-
-        result = [record.dict(by_alias=False) for record in records]
-        logger.info(f"Спарсено {len(result)} записей из {file_path}")
-        return result
-    except Exception as e:
-        logger.error(f"Ошибка при парсинге {file_path}: {e}")
-        return []
+def commit_file(file: BinaryIO, tmp_path: str, output_path: str) -> None:
+    """Сбрасывает временный файл на диск и атомарно переносит его на место."""
+    file.flush()
+    os.fsync(file.fileno())
+    # mkstemp создает файл только для владельца, а бюллетени читают и другие процессы
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, output_path)
 
 
-async def save_batch(batch: List[dict]) -> None:
-    """Сохраняет один батч данных в базу данных с отдельной сессией."""
-    async with async_sessionmaker(async_engine)() as session:
-        try:
-            stmt = insert(SpimexTradingResult).values(batch)
-            await session.execute(stmt)
-            await session.commit()
-            logger.info(f"Сохранен батч из {len(batch)} записей")
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении батча: {e}")
-            await session.rollback()
+async def download_bulletin(session: aiohttp.ClientSession, url: str, output_path: str) -> Optional[int]:
+    """Загружает бюллетень во временный файл и атомарно переносит его на место.
 
+    Возвращает число загруженных байт (0, если файл уже был) или None при ошибке.
+    """
+    if os.path.exists(output_path):
+        logger.info(f"Файл {output_path} уже существует, пропускаем загрузку")
+        return 0
 
-async def process_bulletins(start_date: date, end_date: date, output_dir: str = "bulletins") -> None:
-    """Обрабатывает бюллетени за указанный период."""
-    os.makedirs(output_dir, exist_ok=True)
+    # Недокачанный файл остается только под временным именем и не считается загруженным. Имя уникально:
+    # один и тот же бюллетень могут одновременно качать несколько воркеров или процессов
+    directory = os.path.dirname(output_path) or "."
+    started = time.perf_counter()
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(output_path)}.", suffix=".part")
+    except OSError as e:
+        logger.error(f"Не удалось создать временный файл для {output_path}: {e}")
+        return None
+    file = os.fdopen(fd, "wb")
+
+    async def request(headers_received: Callable[[], None]) -> int:
+        # Повторная попытка перезаписывает файл с начала; запись на диск идет в потоке,
+        # чтобы не задерживать остальные загрузки в цикле событий
+        size = 0
+        async with session.get(url) as response:
+            headers_received()
+            response.raise_for_status()
+            await asyncio.to_thread(rewind_file, file)
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(file.write, chunk)
+                size += len(chunk)
+        return size
 
-    bulletin_urls = await get_bulletin_urls(start_date, end_date)
-    all_records = []
+    try:
+        size = await governor.run("download", url, request)
+        await asyncio.to_thread(commit_file, file, tmp_path, output_path)
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        logger.error(f"Ошибка при загрузке бюллетеня {url}: {e}")
+        return None
+    finally:
+        file.close()
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - started
+    metrics.bulletins_downloaded.inc()
+    metrics.bytes_downloaded.inc(size)
+    metrics.download_duration.observe(elapsed)
+    logger.debug(
+        f"Бюллетень загружен: {output_path}, {size} байт за {elapsed:.2f} с "
+        f"({size / max(elapsed, 1e-6) / 1024:.1f} КБ/с)"
+    )
+    return size
+
+
+async def fetch_bulletin(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+    """Загружает бюллетень в память без записи на диск. Возвращает содержимое или None при ошибке."""
+    started = time.perf_counter()
+
+    async def request(headers_received: Callable[[], None]) -> bytes:
+        async with session.get(url) as response:
+            headers_received()
+            response.raise_for_status()
+            return await response.read()
 
-    for url, trade_date in bulletin_urls:
+    try:
+        content = await governor.run("download", url, request)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Ошибка при загрузке бюллетеня {url}: {e}")
+        return None
+
+    elapsed = time.perf_counter() - started
+    metrics.bulletins_downloaded.inc()
+    metrics.bytes_downloaded.inc(len(content))
+    metrics.download_duration.observe(elapsed)
+    logger.debug(f"Бюллетень загружен в память: {url}, {len(content)} байт за {elapsed:.2f} с")
+    return content
+
+
+@timed("download")
+async def download_bulletins(
+    session: aiohttp.ClientSession,
+    url_queue: asyncio.Queue,
+    file_queue: asyncio.Queue,
+    output_dir: str,
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    manifest: Optional[IngestManifest] = None,
+    archive: Optional[BulletinArchive] = None,
+    archive_queue: Optional[asyncio.Queue] = None,
+) -> None:
+    """Стадия загрузки: берет (url, дата) из url_queue и кладет (путь, дата, содержимое) в file_queue.
+
+    С archive бюллетень не пишется в output_dir: он берется из архива, а если его там нет —
+    загружается в память, уходит в парсинг вместе с содержимым и в archive_queue для архивации.
+    Без archive содержимое None, и парсер читает файл с диска.
+    """
+    latencies = []
+    total_bytes = 0
+
+    async def download_to_memory(url: str, trade_date: date, output_path: str) -> None:
+        nonlocal total_bytes
+        content = None
+        if archive.contains(trade_date):
+            content = await asyncio.to_thread(archive.get, trade_date)
+        if content is None:
+            started = time.perf_counter()
+            content = await fetch_bulletin(session, url)
+            if content is None:
+                return
+            latencies.append(time.perf_counter() - started)
+            total_bytes += len(content)
+            await archive_queue.put((trade_date, url, content))
+        if manifest is not None:
+            bundle_path = archive.bundle_path(archive.month(trade_date))
+            content_hash = hashlib.sha256(content).hexdigest()
+            await manifest.mark_downloaded(url, trade_date, bundle_path, len(content), content_hash)
+        await file_queue.put((output_path, trade_date, content))
+
+    async def download(item: Tuple[str, date]) -> None:
+        nonlocal total_bytes
+        url, trade_date = item
         output_path = os.path.join(output_dir, f"oil_xls_{trade_date.strftime('%Y%m%d')}.xls")
-        if download_bulletin(url, output_path):
-            records = parse_bulletin(output_path, trade_date)
-            all_records.extend(records)
+        if archive is not None:
+            await download_to_memory(url, trade_date, output_path)
+            return
+        started = time.perf_counter()
+        size = await download_bulletin(session, url, output_path)
+        if size is None:
+            return
+        if size:
+            latencies.append(time.perf_counter() - started)
+            total_bytes += size
+        if manifest is not None:
+            await manifest.mark_downloaded(url, trade_date, output_path, size)
+        await file_queue.put((output_path, trade_date, None))
+
+    started = time.perf_counter()
+    await run_stage(concurrency, url_queue, file_queue, download)
+    elapsed = time.perf_counter() - started
+
+    if latencies:
+        logger.info(
+            f"Загружено {len(latencies)} файлов, {total_bytes} байт за {elapsed:.2f} с "
+            f"({total_bytes / max(elapsed, 1e-6) / 1024:.1f} КБ/с), задержка на файл: "
+            f"средняя {sum(latencies) / len(latencies):.2f} с, максимальная {max(latencies):.2f} с"
+        )
+
+
+@timed("parse")
+def create_parse_executor(workers: int) -> ProcessPoolExecutor:
+    """Пул процессов парсинга.
+
+    Процессы запускаются через spawn: fork процесса с потоком QueueListener может зависнуть,
+    а копия очереди логов в дочернем процессе никем не читается. Поэтому каждый процесс
+    настраивает логирование заново с теми же параметрами, что и родительский.
+    """
+    config = logging_config()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_logging if config is not None else None,
+        initargs=config or (),
+    )
+
+
+async def parse_bulletins(
+    file_queue: asyncio.Queue,
+    batch_queue: asyncio.Queue,
+    parallel: bool = False,
+    workers: int = PARSE_WORKERS,
+    batch_size: int = BATCH_SIZE,
+    manifest: Optional[IngestManifest] = None,
+) -> None:
+    """Стадия парсинга: берет (путь, дата, содержимое) из file_queue и кладет батчи записей в batch_queue.
+
+    В параллельном режиме файлы распределяются по пулу процессов, иначе парсятся
+    по одному в потоке, чтобы не блокировать цикл событий.
+    """
+    # pandas и читатели xls нужны только этой стадии, остальные команды их не загружают
+    from bulletin_parser import parse_bulletin_compact
+
+    loop = asyncio.get_running_loop()
+    executor = create_parse_executor(workers) if parallel else None
+
+    async def parse(item: Tuple[str, date, Optional[bytes]]) -> None:
+        file_path, trade_date, content = item
+        started = time.perf_counter()
+        parsed = await loop.run_in_executor(
+            executor, parse_bulletin_compact, file_path, trade_date, PARSE_CACHE_ENABLED, content
+        )
+        metrics.parse_duration.observe(time.perf_counter() - started)
+        if parsed.error is not None:
+            if manifest is not None:
+                await manifest.mark_failed(parsed.trade_date, parsed.error)
+            return
+        metrics.rows_parsed.inc(parsed.row_count)
+        batches = parsed.to_batches(batch_size)
+        if manifest is not None:
+            await manifest.mark_parsed(parsed.trade_date, parsed.row_count, len(batches))
+        for batch in batches:
+            await batch_queue.put(batch)
 
-    if not all_records:
+    try:
+        await run_stage(workers if parallel else 1, file_queue, batch_queue, parse)
+    finally:
+        if executor is not None:
+            # shutdown ждет завершения процессов и блокировал бы цикл событий
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+
+async def save_batch(batch: RecordBatch, method: str = WRITE_METHOD, upsert: bool = WRITE_UPSERT) -> None:
+    """Сохраняет один колоночный батч в базу данных через COPY или INSERT."""
+    check_partition(batch.trade_date)
+    batch = batch.with_column("instrument_id", await dimension_cache.resolve(batch))
+    if method == "copy":
+        await copy_batch(batch, upsert)
+    else:
+        await insert_batch(batch, upsert)
+    logger.debug(f"Сохранен батч из {batch.row_count} записей за {batch.trade_date} ({method})")
+
+
+class WriteResult(NamedTuple):
+    """Итог стадии записи."""
+
+    saved: int
+    failed: int
+    dates: Set[date]
+
+
+@timed("write")
+async def save_batches(
+    batch_queue: asyncio.Queue,
+    concurrency: int = WRITE_CONCURRENCY,
+    manifest: Optional[IngestManifest] = None,
+    committed: Optional[Set[date]] = None,
+) -> WriteResult:
+    """Стадия записи: сохраняет батчи из batch_queue и возвращает число записей, упавших батчей и даты торгов.
+
+    Параллельность ограничена размером пула соединений, чтобы батчи не ждали соединения до таймаута.
+    Даты записанных батчей добавляются в committed сразу после записи, чтобы они были известны
+    вызывающему, даже если конвейер прервется.
+    """
+    concurrency = min(concurrency, pool_capacity())
+    saved = 0
+    failed = 0
+    dates = committed if committed is not None else set()
+
+    async def save(batch: RecordBatch) -> None:
+        nonlocal saved, failed
+        started = time.perf_counter()
+        try:
+            await save_batch(batch)
+        except Exception as e:
+            failed += 1
+            metrics.batch_failures.inc()
+            logger.error(f"Ошибка при сохранении батча из {batch.row_count} записей за {batch.trade_date}: {e}")
+            if manifest is not None:
+                await manifest.batch_failed(batch.trade_date, str(e))
+            return
+        metrics.batch_write_duration.observe(time.perf_counter() - started)
+        metrics.rows_written.inc(batch.row_count)
+        saved += batch.row_count
+        # Батч всегда относится к одному бюллетеню
+        dates.add(batch.trade_date)
+        if manifest is not None:
+            await manifest.batch_saved(batch.trade_date)
+
+    await run_stage(concurrency, batch_queue, None, save)
+    return WriteResult(saved, failed, dates)
+
+
+async def process_bulletins(
+    start_date: date,
+    end_date: date,
+    output_dir: str = "bulletins",
+    parallel_parse: bool = PARALLEL_PARSE,
+    links: Optional[List[Tuple[str, date]]] = None,
+    resume: bool = INGEST_RESUME,
+) -> int:
+    """Обрабатывает бюллетени за указанный период потоковым конвейером и возвращает число сохраненных записей.
+
+    Стадии обхода, загрузки, парсинга и записи работают одновременно и связаны
+    ограниченными очередями, поэтому память не растет с длиной периода.
+    Если links уже собраны (например, опросом первой страницы), обход пропускается.
+    С BULLETIN_STORAGE=archive бюллетени разбираются из памяти, а исходники сжимаются в архив.
+    Ход загрузки пишется в журнал bulletin_manifest; с resume уже загруженные
+    бюллетени пропускаются, а скачанные не загружаются повторно.
+    Метрики запуска выгружаются в METRICS_PROM_FILE и METRICS_SUMMARY_FILE.
+    """
+    # Реестр метрик общий для процесса (демон и backfill запускают конвейер многократно)
+    metrics.reset()
+    committed: Set[date] = set()
+    try:
+        with span("total"):
+            try:
+                saved, failed, _ = await run_pipeline(
+                    start_date, end_date, output_dir, parallel_parse, links, resume, committed
+                )
+            except BaseException:
+                # Батчи, записанные до сбоя или отмены, уже зафиксированы и отмечены в журнале
+                # загруженными: их сводки пересчитываются до выхода, иначе останутся устаревшими
+                await refresh_committed(committed)
+                raise
+            # Сводки пересчитываются только за затронутые даты, в том числе при частично упавшей записи
+            with span("aggregate"):
+                await refresh_aggregates(committed)
+    finally:
+        log_pool_metrics()
+        metrics.export(METRICS_PROM_FILE, METRICS_SUMMARY_FILE)
+
+    if failed:
+        raise RuntimeError(f"Не удалось сохранить {failed} батчей, сохранено {saved} записей")
+    if not saved:
         logger.info("Нет данных для сохранения в базу")
-        return
+        return 0
 
-    batch_size = 1000
-    batches = [all_records[i : i + batch_size] for i in range(0, len(all_records), batch_size)]
+    logger.info(f"Сохранено {saved} записей")
+    await publish_ingest_finished(end_date)
+    return saved
 
-    tasks = [save_batch(batch) for batch in batches]
-    await asyncio.gather(*tasks)
 
-    logger.info(f"Сохранено {len(all_records)} записей в {len(batches)} параллельных батчах")
+async def refresh_committed(dates: Set[date]) -> None:
+    """Пересчитывает сводки за уже записанные даты прерванного запуска; повторная отмена его не прерывает."""
+    if not dates:
+        return
+    try:
+        with span("aggregate"):
+            await asyncio.shield(refresh_aggregates(set(dates)))
+    except Exception as e:
+        logger.error(f"Не удалось пересчитать сводки за {len(dates)} дат прерванной загрузки: {e}")
+
+
+async def locate_uncovered(
+    session: aiohttp.ClientSession,
+    start_date: date,
+    end_date: date,
+    manifest: IngestManifest,
+    on_links: Callable[[List[Tuple[str, date]]], Awaitable[None]],
+) -> None:
+    """Ищет в списке на сайте только бюллетени за будние дни периода, которых нет в журнале.
+
+    Для дат журнала ссылки и файлы уже известны, поэтому возобновление без новых дат
+    обходится без запросов к списку.
+    """
+    from planner import locate_bulletins, missing_trading_days
+
+    uncovered = missing_trading_days(start_date, end_date, set(manifest.entries))
+    logger.info(f"Возобновление по журналу: {len(manifest.entries)} дат в журнале, вне журнала {len(uncovered)}")
+    if uncovered:
+        await on_links(await locate_bulletins(session, uncovered))
+
+
+async def run_pipeline(
+    start_date: date,
+    end_date: date,
+    output_dir: str,
+    parallel_parse: bool,
+    links: Optional[List[Tuple[str, date]]] = None,
+    resume: bool = INGEST_RESUME,
+    committed: Optional[Set[date]] = None,
+) -> WriteResult:
+    """Запускает стадии конвейера и возвращает итог стадии записи."""
+    os.makedirs(output_dir, exist_ok=True)
+    await ensure_partitions(start_date, end_date)
+    await dimension_cache.load()
+    manifest = IngestManifest()
+    await manifest.load(start_date, end_date)
+    skipped = 0
+
+    url_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    file_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    batch_queue = asyncio.Queue(maxsize=2 * WRITE_CONCURRENCY)
+    # В режиме archive исходники идут из памяти в архив, а не в output_dir
+    archive = BulletinArchive(ARCHIVE_DIR) if BULLETIN_STORAGE == "archive" else None
+    archive_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    async with create_http_session() as session:
+
+        async def crawl() -> None:
+            async def enqueue(links: List[Tuple[str, date]]) -> None:
+                nonlocal skipped
+                for url, trade_date in links:
+                    if resume and manifest.is_loaded(trade_date):
+                        skipped += 1
+                        continue
+                    await url_queue.put((url, trade_date))
+
+            if links is not None:
+                await enqueue(links)
+            elif resume and manifest.entries:
+                await enqueue(manifest.unfinished_links())
+                await locate_uncovered(session, start_date, end_date, manifest, enqueue)
+            else:
+                await crawl_bulletin_urls(session, start_date, end_date, enqueue)
+            await url_queue.put(STAGE_DONE)
+            if skipped:
+                logger.info(f"Пропущено {skipped} бюллетеней, уже загруженных по журналу")
+
+        async def download_and_archive() -> None:
+            await download_bulletins(
+                session, url_queue, file_queue, output_dir, manifest=manifest, archive=archive, archive_queue=archive_queue
+            )
+            await archive_queue.put(ARCHIVE_DONE)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(crawl())
+            tg.create_task(download_and_archive())
+            tg.create_task(parse_bulletins(file_queue, batch_queue, parallel_parse, manifest=manifest))
+            write_task = tg.create_task(save_batches(batch_queue, manifest=manifest, committed=committed))
+            if archive is not None:
+                tg.create_task(archive_bulletins(archive, archive_queue))
+
+    return write_task.result()
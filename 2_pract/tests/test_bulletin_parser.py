@@ -0,0 +1,119 @@
+from datetime import date, datetime
+from typing import List, Tuple
+
+import pandas as pd
+import pytest
+
+xlwt = pytest.importorskip("xlwt")
+
+import bulletin_parser  # noqa: E402
+from benchmarks.bulletin_factory import HEADERS, make_products, write_bulletin  # noqa: E402
+from bulletin_parser import REQUIRED_COLUMNS, TradingResultModel  # noqa: E402
+from pydantic import ValidationError  # noqa: E402
+from readers import READERS, BulletinFormatError  # noqa: E402
+
+TRADE_DATE = date(2025, 5, 8)
+FILE_FIELDS = ["date", "created_on", "updated_on"]
+
+
+def parse_rowwise(file_path: str, trade_date: date) -> Tuple[List[dict], List[str]]:
+    """Прежний построчный разбор: pd.read_excel и проверка каждой строки моделью.
+
+    Возвращает записи прошедших проверку строк и коды отклоненных строк.
+    """
+    df = pd.read_excel(file_path, sheet_name=0, header=None)
+    headers = [h.replace("\n", " ").strip() for h in df.iloc[6].fillna("").tolist()[1:]]
+    data_rows = []
+    for i in range(8, len(df)):
+        row = df.iloc[i].tolist()
+        if pd.isna(row[1]) or row[1] == "" or row[1].startswith("Код"):
+            break
+        data_rows.append(row[1:])
+    data_df = pd.DataFrame(data_rows, columns=headers)
+    for col in bulletin_parser.NUMERIC_COLUMNS:
+        data_df[col] = pd.to_numeric(data_df[col].replace("-", pd.NA), errors="coerce").fillna(0)
+    data_df = data_df[data_df["Количество Договоров, шт."] > 0]
+    data_df = data_df[list(REQUIRED_COLUMNS)]
+    data_df = data_df[~data_df["Код Инструмента"].str.contains("Итог", case=False, na=False)]
+
+    now = datetime.now()
+    records, rejected = [], []
+    for row in data_df.to_dict(orient="records"):
+        try:
+            model = TradingResultModel.model_validate({**row, "date": trade_date, "created_on": now, "updated_on": now})
+        except ValidationError:
+            rejected.append(row["Код Инструмента"])
+            continue
+        records.append(model.model_dump(exclude=set(FILE_FIELDS)))
+    return records, rejected
+
+
+def write_rows(file_path: str, rows: List[list]) -> None:
+    """Бюллетень с заданными строками данных в разметке SPIMEX."""
+    workbook = xlwt.Workbook(encoding="utf-8")
+    sheet = workbook.add_sheet("TRADE_SUMMARY")
+    sheet.write(3, 1, f"Дата торгов: {TRADE_DATE.strftime('%d.%m.%Y')}")
+    for col, header in enumerate(HEADERS, start=1):
+        sheet.write(6, col, header)
+    for r, values in enumerate(rows, start=8):
+        for col, value in enumerate(values, start=1):
+            if value is not None:
+                sheet.write(r, col, value)
+    sheet.write(8 + len(rows), 1, "Итого:")
+    workbook.save(file_path)
+
+
+def trade_row(code: str, name, basis: str, count) -> list:
+    if count == "-":
+        return [code, name, basis] + ["-"] * 11
+    return [code, name, basis, 120 * count, 120 * count * 50_000, 0, 0, 0, 50_000, 0, 0, 0, 0, count]
+
+
+@pytest.fixture(scope="module")
+def bulletin(tmp_path_factory) -> str:
+    file_path = str(tmp_path_factory.mktemp("bulletins") / "oil_xls_20250508162000.xls")
+    write_bulletin(file_path, TRADE_DATE, make_products(60, seed=2), seed=2)
+    return file_path
+
+
+@pytest.fixture(scope="module")
+def invalid_bulletin(tmp_path_factory) -> str:
+    file_path = str(tmp_path_factory.mktemp("bulletins") / "oil_xls_20250508162000.xls")
+    write_rows(
+        file_path,
+        [
+            trade_row("A100ANK001A", "Бензин (АИ-100-К5), Ангарск", "Ангарск", 3),
+            trade_row("A092ACH002F", None, "Ачинск", 2),
+            trade_row("A095KRB003J", "Бензин (АИ-95-К5), Кириши", "Кириши", 2.5),
+            trade_row("DTL0OMS004A", 12345, "Омск", 1),
+            trade_row("DTZ0PRM005F", "ДТ зимнее (ДТ-З-К5), Пермь", "Пермь", "-"),
+            trade_row("M100UFA006J", "Мазут топочный М-100, Уфа", "Уфа", 7),
+        ],
+    )
+    return file_path
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_frame_matches_rowwise_records(bulletin, engine, monkeypatch):
+    monkeypatch.setattr(bulletin_parser, "XLS_READER", engine)
+    expected, rejected = parse_rowwise(bulletin, TRADE_DATE)
+    actual = bulletin_parser.parse_bulletin_frame(bulletin, TRADE_DATE).to_dict(orient="records")
+    assert not rejected
+    assert len(expected) > 0
+    assert actual == expected
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_frame_rejects_same_rows_as_rowwise(invalid_bulletin, engine, monkeypatch):
+    monkeypatch.setattr(bulletin_parser, "XLS_READER", engine)
+    reported = []
+    monkeypatch.setattr(
+        bulletin_parser,
+        "report_invalid_rows",
+        lambda data_df, file_path, trade_date: reported.extend(data_df["Код Инструмента"]),
+    )
+    _, rejected = parse_rowwise(invalid_bulletin, TRADE_DATE)
+    with pytest.raises(BulletinFormatError, match=f"{len(rejected)} строк"):
+        bulletin_parser.parse_bulletin_frame(invalid_bulletin, TRADE_DATE)
+    assert rejected == ["A092ACH002F", "A095KRB003J", "DTL0OMS004A"]
+    assert reported == rejected
@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import aiohttp
+import governor
+import pytest
+import yarl
+from governor import AdaptiveLimiter, CircuitBreaker, RequestGovernor, TokenBucket, backoff_delay
+from multidict import CIMultiDict, CIMultiDictProxy
+
+
+URL = yarl.URL("https://spimex.com/upload/reports/oil_xls/oil_xls_20250508162000.xls")
+
+
+def response_error(status: int) -> aiohttp.ClientResponseError:
+    request_info = aiohttp.RequestInfo(URL, "GET", CIMultiDictProxy(CIMultiDict()), URL)
+    return aiohttp.ClientResponseError(request_info, (), status=status, headers={})
+
+
+def test_backoff_delay_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(governor.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt, base=0.5, cap=3.0) for attempt in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_backoff_delay_has_full_jitter():
+    delays = [backoff_delay(3, base=1.0, cap=10.0) for _ in range(200)]
+    assert all(0 <= delay <= 8.0 for delay in delays)
+    assert min(delays) < 4.0 < max(delays)
+
+
+def test_token_bucket_allows_burst_then_rate():
+    async def acquire_all() -> list:
+        bucket = TokenBucket(rate=50, burst=3)
+        started = time.monotonic()
+        moments = []
+        for _ in range(5):
+            await bucket.acquire()
+            moments.append(time.monotonic() - started)
+        return moments
+
+    moments = asyncio.run(acquire_all())
+    assert moments[2] < 0.01
+    # После пачки из burst токенов каждый следующий ждет около 1 / rate
+    assert moments[3] >= 0.015
+    assert moments[4] - moments[3] >= 0.015
+
+
+def test_limiter_additive_increase_and_multiplicative_decrease():
+    limiter = AdaptiveLimiter(min_limit=2, max_limit=8)
+    limiter.limit = 4.0
+    for _ in range(4):
+        limiter.increase()
+    # Рост примерно на 1 за «окно» из limit успешных ответов
+    assert 4.9 < limiter.limit < 5
+    grown = limiter.limit
+
+    limiter.decrease(time.monotonic())
+    assert limiter.limit == pytest.approx(grown / 2)
+
+    limiter.limit = 3.0
+    limiter.decrease(time.monotonic())
+    assert limiter.limit == 2
+
+
+def test_limiter_decreases_once_per_round_trip():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16)
+    before = time.monotonic()
+    limiter.decrease(time.monotonic())
+    assert limiter.limit == 8
+    # Запрос, отправленный до снижения, относится к той же перегрузке
+    limiter.decrease(before)
+    assert limiter.limit == 8
+    limiter.decrease(time.monotonic())
+    assert limiter.limit == 4
+
+
+def test_limiter_caps_in_flight_requests():
+    async def run() -> int:
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=2)
+        peak = 0
+
+        async def request() -> None:
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        return peak
+
+    assert asyncio.run(run()) == 2
+
+
+def test_breaker_opens_after_threshold_and_lets_one_probe():
+    async def run() -> None:
+        breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+        breaker.record_failure()
+        assert not breaker.is_open
+        breaker.record_failure()
+        assert breaker.is_open
+
+        started = time.monotonic()
+        await breaker.wait()
+        assert time.monotonic() - started >= 0.04
+        assert breaker.probing
+
+        # Остальные запросы ждут исхода пробного
+        waiter = asyncio.create_task(breaker.wait())
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+        breaker.record_success()
+        await asyncio.wait_for(waiter, 2)
+        assert not breaker.is_open
+
+    asyncio.run(run())
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    breaker.probing = True
+    breaker.open_until = 0.0
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.probing
+    assert breaker.open_until > time.monotonic() + 5
+
+
+def make_governor() -> RequestGovernor:
+    return RequestGovernor(rate=1000, burst=100, min_concurrency=1, max_concurrency=8, latency_threshold=0.05, retries=3)
+
+
+def test_governor_latency_is_measured_to_headers():
+    async def slow_body(headers_received) -> str:
+        headers_received()
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def slow_headers(headers_received) -> str:
+        await asyncio.sleep(0.1)
+        headers_received()
+        return "ok"
+
+    request_governor = make_governor()
+    assert asyncio.run(request_governor.run("download", str(URL), slow_body)) == "ok"
+    assert request_governor.limiter.limit == 8
+
+    asyncio.run(request_governor.run("download", str(URL), slow_headers))
+    assert request_governor.limiter.limit == 4
+
+
+def test_governor_retries_throttled_requests(monkeypatch):
+    monkeypatch.setattr(governor, "backoff_delay", lambda attempt: 0)
+    attempts = []
+
+    async def request(headers_received) -> str:
+        headers_received()
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise response_error(503)
+        return "ok"
+
+    request_governor = make_governor()
+    assert asyncio.run(request_governor.run("page", str(URL), request)) == "ok"
+    assert len(attempts) == 3
+    assert request_governor.limiter.limit < 8
+
+
+def test_governor_does_not_retry_client_errors():
+    attempts = []
+
+    async def request(headers_received) -> str:
+        attempts.append(1)
+        raise response_error(404)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(make_governor().run("page", str(URL), request))
+    assert len(attempts) == 1
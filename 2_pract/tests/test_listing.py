@@ -0,0 +1,88 @@
+from datetime import date
+
+from config import SPIMEX_URL
+from listing import parse_listing
+
+# Разметка страницы списка SPIMEX с граничными случаями для сравнения с прежним разбором через BeautifulSoup
+LISTING_HTML = """
+<html><body>
+<div class="accordeon-inner">
+  <div class="accordeon-inner__wrap-item">
+    <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_20250508162000.xls?r=3791">
+      Бюллетень 08.05.2025</a>
+  </div>
+  <div class="accordeon-inner__wrap-item">
+    <a class="accordeon-inner__item-title   link xls"
+       href="https://spimex.com/upload/reports/oil_xls/oil_xls_20250507162000.xls">Бюллетень 07.05.2025</a>
+  </div>
+  <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_20250506162000.xls">
+    <span>Бюллетень 06.05.2025</span></a>
+  <a class="accordeon-inner__item-title link xls extra" href="/upload/reports/oil_xls/oil_xls_20250505162000.xls">
+    Лишний класс</a>
+  <a class="link accordeon-inner__item-title xls" href="/upload/reports/oil_xls/oil_xls_20250504162000.xls">
+    Другой порядок классов</a>
+  <a class="accordeon-inner__item-title link pdf" href="/upload/reports/oil_xls/oil_xls_20250503162000.pdf">PDF</a>
+  <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_20250502162000.pdf">
+    Не xls</a>
+  <a class="accordeon-inner__item-title link xls" href="/upload/reports/gas/gas_20250501162000.xls">Не нефть</a>
+  <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_2025XX30162000.xls">
+    Нет даты</a>
+  <a class="accordeon-inner__item-title link xls">Без ссылки</a>
+  <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_20250429162000.xls">
+    Бюллетень 29.04.2025</a>
+</div>
+<div class="bx-pagination bx-pagination-container">
+  <div class="bx-pagination-container row">
+    <ul>
+      <li class="bx-active"><span>1</span></li>
+      <li><a href="?page=page-2"><span>2</span></a></li>
+      <li><span>...</span></li>
+      <li><a href="?page=page-47"><span>47</span></a></li>
+      <li class="bx-pag-next"><a href="?page=page-2"><span>Вперед</span></a></li>
+    </ul>
+  </div>
+</div>
+<div class="bx-pagination-container">
+  <ul><li><span>1</span></li><li><span>99</span></li><li class="bx-pag-next"><span>Вперед</span></li></ul>
+</div>
+</body></html>
+"""
+
+LAST_PAGE_HTML = """
+<a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/oil_xls_20230424162000.xls">Бюллетень</a>
+<div class="bx-pagination-container"><ul>
+  <li><a href="?page=page-46"><span>46</span></a></li>
+  <li class="bx-active"><span>47</span></li>
+  <li class="bx-pag-next"><span>Вперед</span></li>
+</ul></div>
+"""
+
+
+def test_listing_matches_beautifulsoup_links():
+    listing = parse_listing(LISTING_HTML)
+    assert listing.links == [
+        (f"{SPIMEX_URL}/upload/reports/oil_xls/oil_xls_20250508162000.xls", date(2025, 5, 8)),
+        ("https://spimex.com/upload/reports/oil_xls/oil_xls_20250507162000.xls", date(2025, 5, 7)),
+        (f"{SPIMEX_URL}/upload/reports/oil_xls/oil_xls_20250506162000.xls", date(2025, 5, 6)),
+        (f"{SPIMEX_URL}/upload/reports/oil_xls/oil_xls_20250429162000.xls", date(2025, 4, 29)),
+    ]
+
+
+def test_listing_pagination():
+    listing = parse_listing(LISTING_HTML)
+    assert listing.max_pages == 47
+    assert listing.has_next
+
+
+def test_listing_last_page():
+    listing = parse_listing(LAST_PAGE_HTML)
+    assert listing.links == [(f"{SPIMEX_URL}/upload/reports/oil_xls/oil_xls_20230424162000.xls", date(2023, 4, 24))]
+    assert listing.max_pages == 47
+    assert not listing.has_next
+
+
+def test_listing_without_pagination():
+    listing = parse_listing("<html><body><p>Нет бюллетеней</p></body></html>")
+    assert listing.links == []
+    assert listing.max_pages == 1
+    assert not listing.has_next
@@ -0,0 +1,70 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("xlwt")
+
+import bulletin_parser  # noqa: E402
+from benchmarks.bulletin_factory import make_products, write_bulletin  # noqa: E402
+from readers import READERS, BulletinFormatError, read_bulletin_table  # noqa: E402
+
+TRADE_DATE = date(2025, 5, 8)
+COLUMNS = list(bulletin_parser.REQUIRED_COLUMNS)
+
+
+@pytest.fixture(scope="module")
+def bulletin(tmp_path_factory) -> str:
+    file_path = str(tmp_path_factory.mktemp("bulletins") / "oil_xls_20250508162000.xls")
+    write_bulletin(file_path, TRADE_DATE, make_products(40, seed=1), seed=1)
+    return file_path
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_reader_stops_at_block_end(bulletin, engine):
+    data_df = READERS[engine](bulletin, COLUMNS)
+    assert len(data_df) == 40
+    codes = data_df["Код Инструмента"].astype(str)
+    assert not codes.str.startswith("Итог").any()
+
+
+@pytest.mark.parametrize("engine", ["calamine", "xlrd"])
+def test_engines_parse_identical_frames(bulletin, engine, monkeypatch):
+    monkeypatch.setattr(bulletin_parser, "XLS_READER", "pandas")
+    expected = bulletin_parser.parse_bulletin_frame(bulletin, TRADE_DATE)
+    monkeypatch.setattr(bulletin_parser, "XLS_READER", engine)
+    actual = bulletin_parser.parse_bulletin_frame(bulletin, TRADE_DATE)
+    assert expected is not None and len(expected) > 0
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_reader_accepts_content(bulletin, engine):
+    with open(bulletin, "rb") as f:
+        content = f.read()
+    from_file = read_bulletin_table(bulletin, COLUMNS, engine)
+    from_memory = read_bulletin_table(bulletin, COLUMNS, engine, content)
+    pd.testing.assert_frame_equal(from_memory, from_file)
+
+
+@pytest.fixture(scope="module")
+def bulletin_with_blank_names(tmp_path_factory) -> str:
+    file_path = str(tmp_path_factory.mktemp("bulletins") / "oil_xls_20250508162000.xls")
+    products = [(code, "" if i < 5 else name, basis) for i, (code, name, basis) in enumerate(make_products(40, seed=1))]
+    write_bulletin(file_path, TRADE_DATE, products, seed=1)
+    return file_path
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_reader_returns_none_for_blank_cells(bulletin_with_blank_names, engine):
+    data_df = READERS[engine](bulletin_with_blank_names, COLUMNS)
+    names = data_df["Наименование Инструмента"].tolist()
+    assert all(pd.isna(name) for name in names[:5])
+    assert all(isinstance(name, str) and name for name in names[5:])
+
+
+@pytest.mark.parametrize("engine", list(READERS))
+def test_blank_name_is_schema_error(bulletin_with_blank_names, engine, monkeypatch):
+    monkeypatch.setattr(bulletin_parser, "XLS_READER", engine)
+    with pytest.raises(BulletinFormatError, match="проверку схемы"):
+        bulletin_parser.parse_bulletin_frame(bulletin_with_blank_names, TRADE_DATE)